@@ -0,0 +1,61 @@
+"""Measures end-to-end cost of adding blocks to the chain
+
+Blocks are generated and signed up front on a scratch chain, then stored in
+serialized form. Timed part decodes every block and passes it to
+Blockchain.add_block on a fresh chain, the same way Blockchain.load does.
+
+    $ python benchmarks/bench_add_block.py [-blocks=200] [-transactions=5] [-workers=1]
+"""
+from argparse import ArgumentParser
+import time
+from chainee.block import Block
+from chainee.blockchain import Blockchain
+from chainee.transaction import Transaction
+from chainee.utils import address_from_private, sha3_digest
+
+private_key = "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe"
+
+
+def generate_chain(block_count, transaction_count):
+    beneficiary = bytes.fromhex(address_from_private(private_key))
+    blockchain = Blockchain()
+    serialized = []
+    parent_hash = bytes(32)
+    nonce = 0
+    for number in range(block_count):
+        block = Block(number, parent_hash, beneficiary, 0, 1579347167 + number * 60, 0)
+        if number > 0:
+            for _ in range(transaction_count):
+                receiver = sha3_digest(str(nonce).encode("utf-8"))[-20:]
+                transaction = Transaction(nonce, {receiver: 1})
+                transaction.sign(private_key)
+                block.add_transaction(transaction)
+                nonce += 1
+        blockchain.add_block(block)
+        parent_hash = block.hash()
+        serialized.append(block.serialize())
+    return serialized
+
+
+def main():
+    parser = ArgumentParser(description="Block application benchmark")
+    parser.add_argument("-blocks", type=int, default=200)
+    parser.add_argument("-transactions", type=int, default=5)
+    parser.add_argument("-runs", type=int, default=5)
+    parser.add_argument("-workers", type=int, default=1)
+    args = parser.parse_args()
+    serialized = generate_chain(args.blocks, args.transactions)
+    timings = []
+    for _ in range(args.runs):
+        blockchain = Blockchain({"executionworkers": args.workers})
+        start = time.perf_counter()
+        for data in serialized:
+            blockchain.add_block(Block.deserialize(data))
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print("%d blocks, %d transactions per block" % (args.blocks, args.transactions))
+    print("best of %d: %.1f ms, %.1f us per block" % (args.runs, best * 1000, best / args.blocks * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compares chain load time with and without an assumevalid checkpoint
+
+Generates a chain, saves it to a temporary data directory, then loads it
+through Blockchain.load, once with every sender recovered from its signature
+and once with the tip as assumevalid block, taking senders from senders.dat.
+
+    $ python benchmarks/bench_assume_valid.py [-blocks=500] [-transactions=5] [-runs=3]
+"""
+from argparse import ArgumentParser
+import os
+import tempfile
+import time
+from bench_add_block import generate_chain
+from chainee.block import Block
+from chainee.blockchain import Blockchain
+
+
+def measure(config, runs):
+    timings = []
+    for _ in range(runs):
+        blockchain = Blockchain(config)
+        start = time.perf_counter()
+        blockchain.load()
+        timings.append(time.perf_counter() - start)
+    return (min(timings), blockchain)
+
+
+def main():
+    parser = ArgumentParser(description="Assume valid load benchmark")
+    parser.add_argument("-blocks", type=int, default=500)
+    parser.add_argument("-transactions", type=int, default=5)
+    parser.add_argument("-runs", type=int, default=3)
+    args = parser.parse_args()
+    chain = list(generate_chain(args.blocks, args.transactions))
+    tip = Block.deserialize(chain[-1]).hash().hex()
+    with tempfile.TemporaryDirectory() as datadir:
+        # sender index is only kept and saved with assumevalid configured
+        blockchain = Blockchain({"datadir": datadir, "assumevalid": tip})
+        for data in chain:
+            blockchain.add_block(Block.deserialize(data))
+        blockchain.save()
+        if not os.path.exists(os.path.join(datadir, "data", "senders.dat")):
+            raise Exception("senders.dat not saved, assumevalid run would recover every sender")
+        (full, full_chain) = measure({"datadir": datadir}, args.runs)
+        (assumed, assumed_chain) = measure({"datadir": datadir, "assumevalid": tip}, args.runs)
+    if full_chain.get_latest_block().hash() != assumed_chain.get_latest_block().hash():
+        raise Exception("Loaded chains differ")
+    print("%d blocks, %d transactions per block" % (args.blocks, args.transactions))
+    print("%-16s %10.1f ms %10.1f us per block" % ("full", full * 1000, full / args.blocks * 1e6))
+    print("%-16s %10.1f ms %10.1f us per block" % ("assumevalid", assumed * 1000, assumed / args.blocks * 1e6))
+    print("speedup %.2fx" % (full / assumed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Measures startup cost of chainee-tools subcommands and chainee-node
+
+Every case runs in a fresh interpreter, the same way scripts invoke the
+console entry points. Reported time is the wall time of the whole process
+and the total import time reported by -X importtime.
+
+    $ python benchmarks/bench_imports.py [-runs=20]
+"""
+from argparse import ArgumentParser
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+private_key = "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe"
+signature = "b90e97baea96a2120a53d3ba34201705891e79beb8b86cfaf26a4e467264ac6e2481ffed9036a8403161d1d0bf7a7485f6e190d1ffdc1bccefd74fe6c547b30a01"
+block = "000000000000000000000000000000000000000000000000000000000000000000000000c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47a7ffc6f8bf1ed76651c14756a061d662f580ff4de43b49fa82d80a4b80f8434a000000008cc52a5e00000000"
+transaction = "01000138fb65b08416b9870067b6cba63fa50a81bc78c8640000000000000034c4ac66523f355dba984e99baff0d991096bcf52b64909201a604b78fb48433106b598de5a8a69a79655414338dc43f8f197ed0d607e29f12d6f67b6fb852a301"
+
+tools_cases = [
+    ["sha3", "abcdef", "--hex"],
+    ["decodeblock", block],
+    ["decodetransaction", transaction],
+    ["sign", "abcdef", "-private_key=" + private_key, "--hex"],
+    ["recover", "abcdef", signature, "--hex"],
+    ["generateaddress", "-seed=bench"],
+]
+
+
+def run(entry_point, args, stdin=None):
+    code = "import sys; sys.argv = %r; from chainee.%s import main; main()" % (["chainee-" + entry_point] + args, entry_point)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], input=stdin, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    import_time = 0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        # only top level imports, nested ones are part of their cumulative time
+        if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith("  "):
+            import_time += int(parts[1])
+    return (elapsed, import_time)
+
+
+def report(name, samples):
+    wall = sorted(sample[0] for sample in samples)[len(samples) // 2]
+    imports = sorted(sample[1] for sample in samples)[len(samples) // 2]
+    print("%-40s %8.1f ms %8.1f ms" % (name, wall * 1000, imports / 1000))
+
+
+def main():
+    parser = ArgumentParser(description="Startup benchmark")
+    parser.add_argument("-runs", type=int, default=20)
+    args = parser.parse_args()
+    print("%-40s %11s %11s" % ("case", "wall", "imports"))
+    for case in tools_cases:
+        report("chainee-tools " + case[0], [run("tools", case) for _ in range(args.runs)])
+    with tempfile.TemporaryDirectory() as datadir:
+        with open(os.path.join(datadir, "chainee.conf"), "w") as f:
+            f.write("genesisbenficiary=c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47\ngenesistimestamp=1579347167\n")
+        samples = [run("node", ["-datadir=" + datadir], "stop\n") for _ in range(args.runs)]
+        report("chainee-node (start and stop)", samples)
+
+
+if __name__ == "__main__":
+    main()
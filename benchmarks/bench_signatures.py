@@ -0,0 +1,78 @@
+"""Measures per-signature cost of signing and sender recovery
+
+Compares key objects created per call with their own secp256k1 context,
+key objects created per call on the shared context, and the sign_many and
+recover_many functions calling the library directly, one call per
+signature and one call per batch.
+
+    $ python benchmarks/bench_signatures.py [-signatures=2000] [-runs=3]
+"""
+from argparse import ArgumentParser
+from hashlib import sha3_256
+import time
+from secp256k1 import ALL_FLAGS, PrivateKey, PublicKey
+from chainee.utils import address_from_pub_key_bytes, recover_many, secp256k1_context, sign_many
+
+private_key = bytes.fromhex("685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe")
+
+
+def sign_objects(messages, context=None):
+    signatures = []
+    for message in messages:
+        key = PrivateKey(private_key, ctx=context)
+        (signature, recovery) = key.ecdsa_recoverable_serialize(key.ecdsa_sign_recoverable(message, digest=sha3_256))
+        signatures.append(signature + bytes([recovery]))
+    return signatures
+
+
+def recover_objects(items, context=None):
+    addresses = []
+    for (message, signature) in items:
+        pub_key = PublicKey(flags=ALL_FLAGS, ctx=context)
+        raw_signature = pub_key.ecdsa_recoverable_deserialize(signature[:-1], signature[-1])
+        pub_key = PublicKey(pub_key.ecdsa_recover(message, raw_signature, digest=sha3_256), ctx=context)
+        addresses.append(address_from_pub_key_bytes(pub_key.serialize(False)[1:]))
+    return addresses
+
+
+def measure(name, count, runs, function):
+    best = min(timed(function) for _ in range(runs))
+    print("%-32s %10.1f us per signature" % (name, best / count * 1e6))
+    return best
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser(description="Signature benchmark")
+    parser.add_argument("-signatures", type=int, default=2000)
+    parser.add_argument("-runs", type=int, default=3)
+    args = parser.parse_args()
+    messages = [i.to_bytes(8, "little") for i in range(args.signatures)]
+    context = secp256k1_context()
+    items = [(message, private_key) for message in messages]
+    signatures = sign_many(items)
+    if sign_objects(messages[:10]) != signatures[:10]:
+        raise Exception("Signatures differ")
+    signed = list(zip(messages, signatures))
+    if len(set(recover_objects(signed[:10]) + recover_many(signed[:10]))) != 1:
+        raise Exception("Recovered addresses differ")
+
+    count = args.signatures
+    print("%d signatures, best of %d" % (count, args.runs))
+    measure("sign, new context per call", count, args.runs, lambda: sign_objects(messages))
+    measure("sign, key object per call", count, args.runs, lambda: sign_objects(messages, context))
+    measure("sign_many, one per call", count, args.runs, lambda: [sign_many([item]) for item in items])
+    measure("sign_many, batch", count, args.runs, lambda: sign_many(items))
+    measure("recover, new context per call", count, args.runs, lambda: recover_objects(signed))
+    measure("recover, key object per call", count, args.runs, lambda: recover_objects(signed, context))
+    measure("recover_many, one per call", count, args.runs, lambda: [recover_many([item]) for item in signed])
+    measure("recover_many, batch", count, args.runs, lambda: recover_many(signed))
+
+
+if __name__ == "__main__":
+    main()
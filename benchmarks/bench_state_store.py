@@ -0,0 +1,72 @@
+"""Measures lookup and update throughput of the disk state store
+
+Inserts accounts with pseudo-random addresses into a fresh HashedStateStore
+through the StateIndex API, then looks up and updates random accounts.
+Table is presized to the account count unless -grow is given.
+
+    $ python benchmarks/bench_state_store.py [-accounts=10000000] [-operations=1000000]
+"""
+from argparse import ArgumentParser
+from hashlib import sha3_256
+import os
+import random
+import tempfile
+import time
+from chainee.indexing import StateIndex
+from chainee.statestore import HashedStateStore, max_load_factor
+
+
+def address(i):
+    return sha3_256(i.to_bytes(8, "little")).digest()[:20]
+
+
+def measure(name, count, function):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print("%-24s %10.0f ops/s %10.2f us/op" % (name, count / elapsed, elapsed / count * 1e6))
+
+
+def main():
+    parser = ArgumentParser(description="State store benchmark")
+    parser.add_argument("-accounts", type=int, default=10000000)
+    parser.add_argument("-operations", type=int, default=1000000)
+    parser.add_argument("-cache", type=int, default=1 << 14)
+    parser.add_argument("-grow", nargs="?", const=True, default=False)
+    parser.add_argument("-dir", type=str, default=None)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp(dir=args.dir)
+    file = os.path.join(directory, "state.dat")
+    capacity = 16 if args.grow else int(args.accounts / max_load_factor) + 1
+    store = HashedStateStore(file, capacity=capacity, cache_size=args.cache)
+    state = StateIndex(backend=store)
+    rng = random.Random(0)
+    sample = [address(rng.randrange(args.accounts)) for _ in range(args.operations)]
+
+    def insert():
+        for i in range(args.accounts):
+            state.init_account(address(i), i + 1, 1)
+        state.flush()
+
+    def lookup():
+        for key in sample:
+            state.get_balance(key)
+
+    def update():
+        for key in sample:
+            state.set_balance(key, 1)
+        state.flush()
+
+    print("%d accounts, %d random operations, %.0f MiB table" % (
+        args.accounts, args.operations, os.path.getsize(file) / 2 ** 20))
+    measure("insert", args.accounts, insert)
+    measure("lookup", args.operations, lookup)
+    measure("update", args.operations, update)
+    print("cache hit rate %.1f%%" % (100 * store.hits / max(store.hits + store.misses, 1)))
+    store.close()
+    os.remove(file)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
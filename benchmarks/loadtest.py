@@ -0,0 +1,209 @@
+"""Load test of a running node through its command interface
+
+Starts chainee-node on a temporary data directory and feeds it pre-generated
+signed blocks with submitblock, either at a target rate or as fast as the
+node answers. Every submitted block is followed by getaccount and
+gettransaction queries for accounts and transactions already in the chain.
+
+Latency is the time from writing a command until the node prints its next
+prompt. With a target rate it is measured from the scheduled send time, so a
+node falling behind shows up as latency instead of a lower send rate. RSS
+of the node is sampled from /proc during the run.
+
+    $ python benchmarks/loadtest.py [-blocks=2000] [-transactions=5] [-rate=0] [-queries=1]
+        [-config storage=sqlite ...]
+"""
+from argparse import ArgumentParser
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from chainee.block import Block
+from chainee.transaction import Transaction
+from chainee.utils import sha3_digest
+
+# same genesis block as the node creates from the default chainee.conf
+private_key = "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe"
+beneficiary = bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")
+genesis_timestamp = 1579347167
+
+prompt = b"> "
+
+
+def generate_blocks(block_count, transaction_count):
+    """
+    Returns:
+        blocks (List[str]): Serialized blocks following the genesis block, in hex
+        transactions (List[List[str]]): Transaction ids of every block, in hex
+        receivers (List[List[str]]): Receiver addresses of every block, in hex
+    """
+    parent_hash = Block(0, bytes(32), beneficiary, 2 ** 32 - 1, genesis_timestamp, 0).hash()
+    blocks = []
+    transactions = []
+    receivers = []
+    nonce = 0
+    for number in range(1, block_count + 1):
+        block = Block(number, parent_hash, beneficiary, 2 ** 32 - 1, genesis_timestamp + number * 60, 0)
+        block_receivers = []
+        # beneficiary earns 10 per block, which funds the next block
+        for _ in range(transaction_count):
+            receiver = sha3_digest(nonce.to_bytes(8, "little"))[-20:]
+            transaction = Transaction(nonce, {receiver: 1})
+            transaction.sign(private_key)
+            block.add_transaction(transaction)
+            block_receivers.append(receiver.hex())
+            nonce += 1
+        blocks.append(block.serialize().hex())
+        transactions.append([transaction.id().hex() for transaction in block.transactions])
+        receivers.append(block_receivers)
+        parent_hash = block.hash()
+    return (blocks, transactions, receivers)
+
+
+class Node:
+    """chainee-node subprocess driven through stdin and stdout
+
+    Args:
+        datadir (str): Data directory with chainee.conf
+    """
+    def __init__(self, datadir):
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", "-c", "from chainee.node import main; main()", "-datadir=" + datadir],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._buffer = b""
+        self.read_response()
+
+    def read_response(self):
+        """Reads output until the next prompt"""
+        fd = self.process.stdout.fileno()
+        while not self._buffer.endswith(prompt):
+            chunk = os.read(fd, 1 << 16)
+            if len(chunk) == 0:
+                raise Exception("Node exited: " + self._buffer.decode("utf-8", "replace")[-1000:])
+            self._buffer += chunk
+        response = self._buffer[:-len(prompt)].decode("utf-8").strip()
+        self._buffer = b""
+        return response
+
+    def command(self, line):
+        self.process.stdin.write(line.encode("utf-8") + b"\n")
+        self.process.stdin.flush()
+        return self.read_response()
+
+    def rss(self):
+        """Resident set size in bytes"""
+        with open("/proc/%d/status" % self.process.pid) as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def stop(self):
+        self.process.stdin.write(b"stop\n")
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def percentile(sorted_values, p):
+    if len(sorted_values) < 1:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * p / 100), len(sorted_values) - 1)]
+
+
+def report(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    print("%-16s %8d %10.1f/s %9.3f %9.3f %9.3f %9.3f" % (
+        name,
+        len(latencies),
+        len(latencies) / elapsed,
+        percentile(latencies, 50) * 1000,
+        percentile(latencies, 95) * 1000,
+        percentile(latencies, 99) * 1000,
+        latencies[-1] * 1000 if len(latencies) > 0 else 0.0,
+    ))
+
+
+def main():
+    parser = ArgumentParser(description="Node load test")
+    parser.add_argument("-blocks", type=int, default=2000)
+    parser.add_argument("-transactions", type=int, default=5)
+    parser.add_argument("-rate", type=float, default=0, help="Blocks per second, 0 submits as fast as possible")
+    parser.add_argument("-queries", type=int, default=1, help="getaccount and gettransaction calls per block")
+    parser.add_argument("-sample", type=float, default=1.0, help="Seconds between RSS samples")
+    parser.add_argument("-config", nargs="*", default=[], help="Extra chainee.conf lines, like storage=sqlite")
+    parser.add_argument("-seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.transactions > 10:
+        raise Exception("Beneficiary earns only 10 per block, use at most 10 transactions")
+
+    print("generating %d blocks with %d transactions" % (args.blocks, args.transactions))
+    (blocks, transactions, receivers) = generate_blocks(args.blocks, args.transactions)
+    random.seed(args.seed)
+
+    datadir = tempfile.mkdtemp(prefix="chainee-loadtest-")
+    try:
+        with open(os.path.join(datadir, "chainee.conf"), "w") as f:
+            f.write("genesisbenficiary=%s\n" % beneficiary.hex())
+            f.write("genesistimestamp=%d\n" % genesis_timestamp)
+            for line in args.config:
+                f.write(line + "\n")
+        node = Node(datadir)
+        latencies = {"submitblock": [], "getaccount": [], "gettransaction": []}
+        errors = []
+        samples = [(0.0, 0, node.rss())]
+        start = time.perf_counter()
+        next_sample = start + args.sample
+        for (i, block) in enumerate(blocks):
+            scheduled = time.perf_counter()
+            if args.rate > 0:
+                scheduled = start + i / args.rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            response = node.command("submitblock " + block)
+            latencies["submitblock"].append(time.perf_counter() - scheduled)
+            if response != "":
+                errors.append(response)
+            for _ in range(args.queries if args.transactions > 0 else 0):
+                committed = random.randrange(i + 1)
+                sent = time.perf_counter()
+                node.command("getaccount " + random.choice(receivers[committed]))
+                latencies["getaccount"].append(time.perf_counter() - sent)
+                sent = time.perf_counter()
+                node.command("gettransaction " + random.choice(transactions[committed]))
+                latencies["gettransaction"].append(time.perf_counter() - sent)
+            now = time.perf_counter()
+            if now >= next_sample:
+                samples.append((now - start, i + 1, node.rss()))
+                next_sample = now + args.sample
+        elapsed = time.perf_counter() - start
+        samples.append((elapsed, len(blocks), node.rss()))
+        node.stop()
+    finally:
+        shutil.rmtree(datadir, ignore_errors=True)
+
+    print("%-16s %8s %12s %9s %9s %9s %9s" % ("command", "calls", "throughput", "p50 ms", "p95 ms", "p99 ms", "max ms"))
+    for (name, values) in latencies.items():
+        report(name, values, elapsed)
+    print("%d blocks in %.2f s, %.1f blocks/s, %.1f transactions/s" % (
+        len(blocks), elapsed, len(blocks) / elapsed, len(blocks) * args.transactions / elapsed,
+    ))
+    print("%10s %8s %10s" % ("time s", "blocks", "rss MB"))
+    for (t, count, rss) in samples:
+        print("%10.1f %8d %10.1f" % (t, count, rss / 2 ** 20))
+    print("rss growth %.1f MB, %.0f bytes per block" % (
+        (samples[-1][2] - samples[0][2]) / 2 ** 20,
+        (samples[-1][2] - samples[0][2]) / max(len(blocks), 1),
+    ))
+    if len(errors) > 0:
+        print("%d blocks rejected, first error: %s" % (len(errors), errors[0]))
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+from typing import Any, Callable, Dict, Iterator, List, TextIO
+
+
+def sha3_operation(request: Dict[str, Any]) -> Any:
+    from chainee.utils import sha3
+    return sha3(request["input"], request.get("hex", False))
+
+
+def sign_operation(request: Dict[str, Any]) -> Any:
+    from chainee.utils import sign
+    return sign(request["message"], request["private_key"], request.get("hex", False))
+
+
+def recover_operation(request: Dict[str, Any]) -> Any:
+    from chainee.utils import recover
+    return recover(request["message"], request["signature"], request.get("hex", False))
+
+
+def create_transaction_operation(request: Dict[str, Any]) -> Any:
+    from chainee.transaction import Transaction
+    out = {bytes.fromhex(address): amount for (address, amount) in request["out"].items()}
+    transaction = Transaction(request["nonce"], out)
+    transaction.sign(request["private_key"])
+    return transaction.serialize().hex()
+
+
+def decode_transaction_operation(request: Dict[str, Any]) -> Any:
+    from chainee.transaction import Transaction
+    return Transaction.deserialize(bytes.fromhex(request["data"])).to_dict()
+
+
+def decode_block_operation(request: Dict[str, Any]) -> Any:
+    from chainee.block import Block
+    return Block.deserialize(bytes.fromhex(request["data"])).to_dict()
+
+
+operations: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "createtransaction": create_transaction_operation,
+    "decodeblock": decode_block_operation,
+    "decodetransaction": decode_transaction_operation,
+    "recover": recover_operation,
+    "sha3": sha3_operation,
+    "sign": sign_operation,
+}
+
+
+def process_line(line: str) -> str:
+    """
+    Args:
+        line (str): JSON request, {"command": ..., "id": ..., <arguments>}
+
+    Returns:
+        response (str): JSON with "result" or "error", and "id" of request if given
+    """
+    response: Dict[str, Any] = {}
+    try:
+        request = json.loads(line)
+        if "id" in request:
+            response["id"] = request["id"]
+        if request.get("command") not in operations:
+            raise Exception("Unrecognized command")
+        response["result"] = operations[request["command"]](request)
+    except Exception as e:
+        response["error"] = str(e)
+    return json.dumps(response, separators=(",", ":"))
+
+
+def process_chunk(lines: List[str]) -> str:
+    return "".join(process_line(line) + "\n" for line in lines)
+
+
+def read_chunks(input: TextIO, chunk_size: int) -> Iterator[List[str]]:
+    chunk = []
+    for line in input:
+        if line.strip() == "":
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def run_batch(input: TextIO, output: TextIO, workers: int = 1, chunk_size: int = 256) -> None:
+    """Answers newline-delimited JSON requests from input, in input order
+
+    Requests are processed in chunks, on a pool of worker processes when
+    more than one worker is asked for. At most two chunks per worker are in
+    flight, so memory stays constant however long the input is.
+    """
+    if workers <= 1:
+        for chunk in read_chunks(input, chunk_size):
+            output.write(process_chunk(chunk))
+        output.flush()
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in read_chunks(input, chunk_size):
+            pending.append(pool.submit(process_chunk, chunk))
+            if len(pending) >= workers * 2:
+                output.write(pending.popleft().result())
+        while len(pending) > 0:
+            output.write(pending.popleft().result())
+    output.flush()
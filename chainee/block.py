@@ -1,21 +1,27 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional
 from struct import pack, unpack
 from .transaction import Transaction
-from .utils import sha3, merkle_tree_root
+from .utils import sha3_digest, merkle_tree_root, encode_varint, decode_varint
+
+header_size = 100
+# starts versioned block body, legacy bodies never begin with 65535
+# transactions, as those could not fit into "<H" framed index files
+body_marker = b"\xff\xff"
+body_version = 1
 
 
 class Block:
     """
     Args:
         number (int): Index of block in blockchain
-        parent_hash (str): Hash of parent block
-        beneficiary (str): Address of creator of the block
+        parent_hash (bytes): Hash of parent block
+        beneficiary (bytes): Address of creator of the block
         target (int): Not implemented
         timestamp (int): In seconds
         nonce (int): Artibtrary data to match target
         transactions: Block transactions
     """
-    def __init__(self, number: int, parent_hash: str, beneficiary: str, target: int, timestamp: int, nonce: int, transactions: List[Transaction] = []):
+    def __init__(self, number: int, parent_hash: bytes, beneficiary: bytes, target: int, timestamp: int, nonce: int, transactions: List[Transaction] = []):
         self.number = number
         self.parent_hash = parent_hash
         self.beneficiary = beneficiary
@@ -23,25 +29,70 @@ class Block:
         self.timestamp = timestamp
         self.nonce = nonce
         self.transactions: List[Transaction] = []
+        # root read from serialized header, dropped when transactions change
+        self._transactions_root: Optional[bytes] = None
         for transaction in transactions:
             self.add_transaction(transaction)
 
-    def hash(self) -> str:
-        return sha3(self.serialize(False))
+    def hash(self) -> bytes:
+        return sha3_digest(self.serialize(False))
 
-    def transactions_root(self) -> str:
+    def transactions_root(self) -> bytes:
+        if self._transactions_root is not None:
+            return self._transactions_root
         if len(self.transactions) < 1:
-            return sha3("")
-        hashes = list(map(lambda transaction: transaction.id(), self.transactions))
+            return sha3_digest(b"")
+        hashes = [transaction.id() for transaction in self.transactions]
         hashes.sort()
         return merkle_tree_root(hashes)
 
     def add_transaction(self, transaction: Transaction) -> None:
         self.transactions.append(transaction)
+        self._transactions_root = None
+
+    def addresses(self) -> List[bytes]:
+        """
+        Returns:
+            addresses (List[bytes]): Beneficiary, senders and receivers touched by the block
+        """
+        addresses = [self.beneficiary]
+        for transaction in self.transactions:
+            sender = transaction.address()
+            if sender is not None:
+                addresses.append(sender)
+            addresses.extend(transaction.out.keys())
+        return list(dict.fromkeys(addresses))
 
-    def to_dict(self) -> Dict[str, Any]:
-        dt = self.__dict__.copy()
-        dt["hash"] = self.hash()
+    def header_to_dict(self, block_hash: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Args:
+            block_hash (bytes): Hash of the block if already known, saves hashing
+        """
+        if block_hash is None:
+            block_hash = self.hash()
+        return {
+            "number": self.number,
+            "parent_hash": self.parent_hash.hex(),
+            "beneficiary": self.beneficiary.hex(),
+            "transactions_root": self.transactions_root().hex(),
+            "target": self.target,
+            "timestamp": self.timestamp,
+            "nonce": self.nonce,
+            "transaction_count": len(self.transactions),
+            "hash": block_hash.hex(),
+        }
+
+    def to_dict(self, block_hash: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Args:
+            block_hash (bytes): Hash of the block if already known, saves hashing
+        """
+        if block_hash is None:
+            block_hash = self.hash()
+        dt = {key: value for (key, value) in self.__dict__.items() if not key.startswith("_")}
+        dt["hash"] = block_hash.hex()
+        dt["parent_hash"] = self.parent_hash.hex()
+        dt["beneficiary"] = self.beneficiary.hex()
         dt["transactions"] = dt["transactions"][:]
         for i in range(len(dt["transactions"])):
             dt["transactions"][i] = dt["transactions"][i].to_dict()
@@ -51,40 +102,60 @@ class Block:
         serialized = pack(
             "<I32s20s32sIII",
             self.number,
-            bytes.fromhex(self.parent_hash),
-            bytes.fromhex(self.beneficiary),
-            bytes.fromhex(self.transactions_root()),
+            self.parent_hash,
+            self.beneficiary,
+            self.transactions_root(),
             self.target,
             self.timestamp,
             self.nonce
         )
         if not includeTransactions:
             return serialized
-        serialized += pack("<H", len(self.transactions))
+        parts = [serialized, body_marker, bytes([body_version]), encode_varint(len(self.transactions))]
         for transaction in self.transactions:
             serialized_transaction = transaction.serialize()
-            serialized += pack("<H", len(serialized_transaction)) + serialized_transaction
-        return serialized
+            parts.append(encode_varint(len(serialized_transaction)))
+            parts.append(serialized_transaction)
+        return b"".join(parts)
 
     @staticmethod
-    def deserialize(data: bytes) -> 'Block':
-        (number, parent_hash, beneficiary, transactions_root, target, timestamp, nonce) = unpack("<I32s20s32sIII", data[:100])
-        parent_hash = parent_hash.hex()
-        beneficiary = beneficiary.hex()
-        transactions_root = transactions_root.hex()
-        block = Block(number, parent_hash, beneficiary, target, timestamp, nonce)
-        if len(data) == 100:
-            return block
-        # transaction_count = unpack("<H", data[100:102])[0]
-        transaction_block = data[102:]
-        pos = 0
-        while pos < len(transaction_block):
-            size = unpack("<H", transaction_block[pos:(pos + 2)])[0]
+    def decode_transactions(data: bytes) -> Iterator[Transaction]:
+        """Decodes transactions of serialized block one at a time
+
+        Reads both the versioned body and the legacy one, where transaction
+        count and sizes are "<H" and which never starts with body marker.
+        """
+        if len(data) <= header_size:
+            return
+        body = memoryview(data)[header_size:]
+        if body[:2] == body_marker:
+            if body[2] != body_version:
+                raise Exception("Unknown block version")
+            (count, pos) = decode_varint(body, 3)
+            for _ in range(count):
+                (size, pos) = decode_varint(body, pos)
+                yield Transaction.deserialize(bytes(body[pos:(pos + size)]))
+                pos += size
+            if pos != len(body):
+                raise Exception("Invalid block size")
+            return
+        pos = 2
+        while pos < len(body):
+            size = unpack("<H", body[pos:(pos + 2)])[0]
             pos += 2
-            transaction = transaction_block[pos:(pos + size)]
+            yield Transaction.deserialize(bytes(body[pos:(pos + size)]))
             pos += size
-            transaction = Transaction.deserialize(transaction)
-            block.add_transaction(transaction)
-        if transactions_root != block.transactions_root():
-            raise Exception('Invalid root')
+
+    @staticmethod
+    def deserialize(data: bytes) -> 'Block':
+        (number, parent_hash, beneficiary, transactions_root, target, timestamp, nonce) = unpack("<I32s20s32sIII", data[:header_size])
+        block = Block(number, parent_hash, beneficiary, target, timestamp, nonce)
+        if len(data) > header_size:
+            for transaction in Block.decode_transactions(data):
+                block.add_transaction(transaction)
+            if transactions_root != block.transactions_root():
+                raise Exception('Invalid root')
+            # headers and hashes of stored blocks are served without rehashing transactions,
+            # root of a header without body is not checked, so it is not kept
+            block._transactions_root = transactions_root
         return block
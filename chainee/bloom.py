@@ -0,0 +1,58 @@
+from hashlib import sha3_256
+from math import ceil, log
+from struct import pack, unpack
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Args:
+        size (int): Number of bits in the filter
+        hash_count (int): Number of bit positions set per item
+        bits (bytes): Raw bit array, zeroed when omitted
+    """
+    def __init__(self, size: int, hash_count: int, bits: bytes = None):
+        self.size = size
+        self.hash_count = hash_count
+        if bits is None:
+            bits = bytes((size + 7) // 8)
+        self.bits = bytearray(bits)
+
+    @staticmethod
+    def create(items: Iterable[bytes], false_positive_rate: float) -> 'BloomFilter':
+        """Creates filter sized for given items and false positive rate"""
+        items = list(items)
+        if not 0 < false_positive_rate < 1:
+            raise Exception("False positive rate not valid")
+        count = max(len(items), 1)
+        size = max(int(ceil(-count * log(false_positive_rate) / (log(2) ** 2))), 8)
+        hash_count = max(int(round(size / count * log(2))), 1)
+        bloom = BloomFilter(size, hash_count)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item: bytes) -> Iterable[int]:
+        # double hashing, both halves taken from a single sha3 digest
+        digest = sha3_256(item).digest()
+        (h1, h2) = unpack("<QQ", digest[:16])
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: bytes) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: bytes) -> bool:
+        for position in self._positions(item):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def serialize(self) -> bytes:
+        return pack("<IB", self.size, self.hash_count) + bytes(self.bits)
+
+    @staticmethod
+    def deserialize(data: bytes) -> 'BloomFilter':
+        (size, hash_count) = unpack("<IB", data[:5])
+        return BloomFilter(size, hash_count, data[5:])
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import sys
+from typing import Any, Dict, Hashable, Optional
+
+
+class ResponseCache:
+    """Least recently used cache of rendered responses, bounded by memory
+
+    Args:
+        max_size (int): Most bytes taken by cached responses
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, str]' = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        size = sys.getsizeof(value)
+        if size > self.max_size:
+            return
+        if key in self._entries:
+            self.size -= sys.getsizeof(self._entries.pop(key))
+        self._entries[key] = value
+        self.size += size
+        while self.size > self.max_size:
+            (_, evicted) = self._entries.popitem(last=False)
+            self.size -= sys.getsizeof(evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def hit_rate(self) -> float:
+        if self.hits + self.misses == 0:
+            return 0.0
+        return self.hits / (self.hits + self.misses)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+        }
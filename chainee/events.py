@@ -0,0 +1,184 @@
+import json
+import os
+from queue import Full, Queue
+import socket
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Set
+from .block import Block
+from .indexing import StateIndex
+
+# events waiting for a subscriber before it is disconnected
+default_queue_size = 1024
+
+# closes the writer thread of a subscriber
+_END = None
+
+address_size = 20
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    return json.dumps(event, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class Subscriber:
+    """Connected client of the event server
+
+    Events are sent by a writer thread from a bounded queue, so a slow client
+    never blocks the node. Client sends "watch <address>" or "unwatch
+    <address>" lines to choose accounts it receives balance events for.
+
+    Args:
+        connection (socket.socket): Accepted client connection
+        queue_size (int): Most events waiting to be sent
+    """
+    def __init__(self, connection: socket.socket, queue_size: int):
+        self.connection = connection
+        self.watched: Set[bytes] = set()
+        self.closed = False
+        self._queue: 'Queue[Optional[bytes]]' = Queue(maxsize=queue_size)
+
+    def send(self, data: bytes) -> bool:
+        """Queues encoded event, returns False when the queue is full"""
+        try:
+            self._queue.put_nowait(data)
+            return True
+        except Full:
+            return False
+
+    def write(self) -> None:
+        while True:
+            data = self._queue.get()
+            if data is _END:
+                break
+            try:
+                self.connection.sendall(data)
+            except OSError:
+                break
+        self.close()
+
+    def read(self, server: 'EventServer') -> None:
+        try:
+            for line in self.connection.makefile("r", encoding="utf-8"):
+                command = line.strip().split(" ")
+                if len(command) != 2 or command[0].lower() not in ["watch", "unwatch"]:
+                    self.send(encode_event({"type": "error", "message": "Unrecognized command"}))
+                    continue
+                try:
+                    address = bytes.fromhex(command[1])
+                except ValueError:
+                    address = b""
+                if len(address) != address_size:
+                    self.send(encode_event({"type": "error", "message": "Address not valid"}))
+                    continue
+                if command[0].lower() == "watch":
+                    self.watched.add(address)
+                else:
+                    self.watched.discard(address)
+                self.send(encode_event({"type": command[0].lower(), "address": address.hex()}))
+        except (OSError, ValueError):
+            pass
+        server.remove(self)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+
+
+class EventServer:
+    """Pushes newline-delimited JSON events about committed blocks to local clients
+
+    Every subscriber receives a block event and one transaction event per
+    transaction of each committed block, and balance events for changed
+    accounts it watches. Subscribers with a full queue are disconnected.
+
+    Args:
+        address (str): "host:port" for TCP, a path for Unix socket
+        queue_size (int): Most events waiting for one subscriber
+    """
+    def __init__(self, address: str, queue_size: int = default_queue_size):
+        self.queue_size = queue_size
+        self.subscribers: List[Subscriber] = []
+        self.disconnected = 0
+        self._lock = Lock()
+        if "/" in address or ":" not in address:
+            if os.path.exists(address):
+                os.remove(address)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.bind(address)
+        else:
+            (host, port) = address.rsplit(":", 1)
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind((host, int(port)))
+        self.address = self._socket.getsockname()
+        self._socket.listen()
+
+    def start(self) -> None:
+        Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                (connection, _) = self._socket.accept()
+            except OSError:
+                return
+            subscriber = Subscriber(connection, self.queue_size)
+            with self._lock:
+                self.subscribers.append(subscriber)
+            Thread(target=subscriber.write, daemon=True).start()
+            Thread(target=subscriber.read, args=(self,), daemon=True).start()
+
+    def remove(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+        # wakes the writer, or is dropped when the queue is full anyway
+        if not subscriber.send(_END):
+            subscriber.close()
+
+    def publish(self, block_hash: bytes, block: Block, state: StateIndex) -> None:
+        """Listener of Blockchain.add_block, state holds accounts changed by the block"""
+        with self._lock:
+            subscribers = self.subscribers[:]
+        if len(subscribers) < 1:
+            return
+        event = block.header_to_dict(block_hash)
+        event["type"] = "block"
+        events = [encode_event(event)]
+        for transaction in block.transactions:
+            event = transaction.to_dict()
+            event["type"] = "transaction"
+            event["block"] = block_hash.hex()
+            events.append(encode_event(event))
+        balances: Dict[bytes, bytes] = {}
+        for subscriber in subscribers:
+            for address in list(subscriber.watched):
+                if address not in balances and state.is_set(address):
+                    balances[address] = encode_event({
+                        "type": "balance",
+                        "address": address.hex(),
+                        "block": block_hash.hex(),
+                        "balance": state.get_balance(address),
+                        "nonce": state.get_nonce(address),
+                    })
+        for subscriber in subscribers:
+            sent = all(subscriber.send(event) for event in events)
+            sent = sent and all(
+                subscriber.send(balances[address]) for address in list(subscriber.watched) if address in balances
+            )
+            if not sent:
+                self.disconnected += 1
+                self.remove(subscriber)
+
+    def stop(self) -> None:
+        self._socket.close()
+        with self._lock:
+            subscribers = self.subscribers[:]
+        for subscriber in subscribers:
+            self.remove(subscriber)
@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import Callable, Dict, List, Optional
+from .indexing import StateIndex
+from .transaction import Transaction
+
+
+class ExecutionStats:
+    """
+    Args:
+        transactions (int): Number of transactions in the block
+        groups (int): Number of independent transaction groups
+        largest_group (int): Number of transactions in the largest group
+    """
+    def __init__(self, transactions: int, groups: int, largest_group: int):
+        self.transactions = transactions
+        self.groups = groups
+        self.largest_group = largest_group
+
+    def parallelism(self) -> float:
+        """Transactions per sequential step, 1.0 means no parallelism was found"""
+        if self.largest_group < 1:
+            return 1.0
+        return self.transactions / self.largest_group
+
+    def to_dict(self) -> Dict[str, float]:
+        dt = self.__dict__.copy()
+        dt["parallelism"] = self.parallelism()
+        return dt
+
+
+def partition_transactions(transactions: List[Transaction]) -> List[List[int]]:
+    """Splits transactions into groups not sharing any sender or receiver
+
+    Returns:
+        groups (List[List[int]]): Transaction positions, groups and positions
+            within groups are in block order
+    """
+    parents: Dict[Optional[bytes], Optional[bytes]] = {}
+
+    def find(address: Optional[bytes]) -> Optional[bytes]:
+        root = address
+        while parents[root] != root:
+            root = parents[root]
+        while parents[address] != root:
+            (parents[address], address) = (root, parents[address])
+        return root
+
+    for transaction in transactions:
+        addresses = [transaction.address()] + list(transaction.out.keys())
+        for address in addresses:
+            parents.setdefault(address, address)
+        root = find(addresses[0])
+        for address in addresses[1:]:
+            other = find(address)
+            if other != root:
+                parents[other] = root
+    groups: Dict[Optional[bytes], List[int]] = {}
+    for (i, transaction) in enumerate(transactions):
+        groups.setdefault(find(transaction.address()), []).append(i)
+    return list(groups.values())
+
+
+class ParallelExecutor:
+    """Recovers senders of a block on a worker pool, then applies transactions in order
+
+    Signature recovery runs in libsecp256k1, which releases the GIL, so it
+    is split into one batch per worker. There are no more workers than
+    CPUs, with a single one the batch is recovered without the pool. Applying transactions is Python
+    code, which threads cannot run in parallel, so it stays sequential.
+    Independent groups of transactions are still counted and reported.
+    Transactions whose batch failed are recovered again when applied, so
+    the error of the earliest invalid transaction in block order is raised.
+
+    Args:
+        workers (int): Number of worker threads
+    """
+    def __init__(self, workers: int):
+        self.workers = max(1, min(workers, os.cpu_count() or 1))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if self.workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def execute(
+        self,
+        state: StateIndex,
+        transactions: List[Transaction],
+        apply: Callable[[Transaction, StateIndex], None],
+    ) -> ExecutionStats:
+        """
+        Args:
+            state (StateIndex): Block state, transactions are applied to it
+            transactions (List[Transaction]): Transactions in block order
+            apply: Validates and applies single transaction to a state
+
+        Returns:
+            stats (ExecutionStats): Parallelism found in the block
+        """
+        def recover(batch: List[Transaction]) -> None:
+            try:
+                Transaction.recover_senders(batch)
+            except Exception:
+                pass
+
+        if self._pool is None:
+            recover(transactions)
+        else:
+            size = max(-(-len(transactions) // self.workers), 1)
+            list(self._pool.map(recover, [transactions[i:(i + size)] for i in range(0, len(transactions), size)]))
+        for transaction in transactions:
+            apply(transaction, state)
+        groups = partition_transactions(transactions)
+        return ExecutionStats(
+            len(transactions),
+            len(groups),
+            max([len(group) for group in groups], default=0),
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
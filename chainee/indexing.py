@@ -1,41 +1,67 @@
 import json
 import os
 import struct
-from typing import Dict, Generic, List, Optional, TypeVar
+from typing import BinaryIO, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar, Union
 from .block import Block
-from .utils import validate_address
+from .bloom import BloomFilter
+from .storage import Backend, MemoryBackend
+from .utils import validate_address, encode_varint
 
 T = TypeVar('T')
+# hashes and addresses are raw bytes, block numbers are decimal strings
+Key = Union[bytes, str]
+# starts index files with varint framed records, an empty "<BH" record in
+# older files is never written
+file_magic = b"\x00\x00\x00CIDX\x01"
 
 
 class Index(Generic[T]):
-    def __init__(self, parent: 'Optional[Index[T]]' = None):
-        self._index: Dict[str, T] = {}
+    def __init__(self, parent: 'Optional[Index[T]]' = None, backend: Optional[Backend] = None):
+        if backend is None:
+            backend = MemoryBackend()
+        self._backend = backend
         self._parent = parent
 
-    def keys(self) -> List[str]:
-        return list(self._index.keys())
+    def keys(self) -> List[Key]:
+        if self._backend.serialized:
+            return [self._deserialize_key(key) for key in self._backend.keys()]
+        return self._backend.keys()
 
-    def is_set(self, key: str) -> bool:
-        return key in self._index
+    def count(self) -> int:
+        return self._backend.count()
 
-    def set(self, key: str, value: T) -> None:
-        self._index[key] = value
+    def flush(self) -> None:
+        self._backend.flush()
 
-    def get(self, key: str) -> Optional[T]:
-        if self._parent is not None and not self.is_set(key):
+    def is_set(self, key: Key) -> bool:
+        if self._backend.serialized:
+            key = self._serialize_key(key)
+        return self._backend.contains(key)
+
+    def set(self, key: Key, value: T) -> None:
+        if self._backend.serialized:
+            self._backend.set(self._serialize_key(key), self._serialize_value(value))
+            return
+        self._backend.set(key, value)
+
+    def get(self, key: Key) -> Optional[T]:
+        if self._backend.serialized:
+            value = self._backend.get(self._serialize_key(key))
+            if value is not None:
+                value = self._deserialize_value(value)
+        else:
+            value = self._backend.get(key)
+        if value is None and self._parent is not None:
             return self._parent.get(key)
-        if not self.is_set(key):
-            return None
-        return self._index[key]
+        return value
 
-    def _serialize_key(self, key: str) -> bytes:
+    def _serialize_key(self, key: Key) -> bytes:
         return key.encode("ascii")
 
     def _serialize_value(self, value: T) -> bytes:
         return json.dumps(value, indent=0, separators=(',', ':')).encode("utf-8")
 
-    def _deserialize_key(self, key: bytes) -> str:
+    def _deserialize_key(self, key: bytes) -> Key:
         return key.decode("ascii")
 
     def _deserialize_value(self, value: bytes) -> T:
@@ -44,128 +70,139 @@ class Index(Generic[T]):
     def save(self, file: str) -> None:
         os.makedirs(os.path.dirname(file), exist_ok=True)
         f = open(file, "wb")
+        f.write(file_magic)
         for key in self.keys():
             serialized_value = self._serialize_value(self.get(key))
             serialized_key = self._serialize_key(key)
-            f.write(struct.pack("<BH", len(serialized_key), len(serialized_value)))
+            f.write(encode_varint(len(serialized_key)) + encode_varint(len(serialized_value)))
             f.write(serialized_key)
             f.write(serialized_value)
         f.close()
 
     def load(self, file: str, ignore: bool = True) -> None:
-        f = open(file, "rb")
-        line_header = f.read(3)
-        while line_header != b"":
-            (key_size, value_size) = struct.unpack("<BH", line_header)
-            key = self._deserialize_key(f.read(key_size))
-            value = self._deserialize_value(f.read(value_size))
-            self.set(key, value)
-            line_header = f.read(3)
-        f.close()
+        for (key, value) in read_records(file):
+            self.set(self._deserialize_key(key), self._deserialize_value(value))
 
 
-class HexIndex(Index[str]):
-    def __init__(self, parent: Optional[Index[str]] = None):
-        Index.__init__(self, parent)
+# keys and values are raw hashes or addresses, stored as they are
+class HexIndex(Index[bytes]):
+    def __init__(self, parent: Optional[Index[bytes]] = None, backend: Optional[Backend] = None):
+        Index.__init__(self, parent, backend)
 
-    def _serialize_key(self, key: str) -> bytes:
-        return bytes.fromhex(key)
+    def _serialize_key(self, key: bytes) -> bytes:
+        return key
 
-    def _serialize_value(self, value: str) -> bytes:
-        return bytes.fromhex(value)
+    def _serialize_value(self, value: bytes) -> bytes:
+        return value
 
-    def _deserialize_key(self, key: bytes) -> str:
-        return key.hex()
+    def _deserialize_key(self, key: bytes) -> bytes:
+        return key
 
-    def _deserialize_value(self, value: bytes) -> str:
-        return value.hex()
+    def _deserialize_value(self, value: bytes) -> bytes:
+        return value
 
 
 class BlockIndex(Index[Block]):
-    def __init__(self, parent: Optional[Index[Block]] = None):
-        Index.__init__(self, parent)
+    def __init__(self, parent: Optional[Index[Block]] = None, backend: Optional[Backend] = None):
+        Index.__init__(self, parent, backend)
 
-    def _serialize_key(self, key: str) -> bytes:
-        return bytes.fromhex(key)
+    def _serialize_key(self, key: bytes) -> bytes:
+        return key
 
     def _serialize_value(self, value: Block) -> bytes:
         return value.serialize()
 
-    def _deserialize_key(self, key: bytes) -> str:
-        return key.hex()
+    def _deserialize_key(self, key: bytes) -> bytes:
+        return key
 
     def _deserialize_value(self, value: bytes) -> Block:
         return Block.deserialize(value)
 
 
-class BlockHashIndex(Index[str]):
-    def __init__(self, parent: Optional[Index[str]] = None):
-        Index.__init__(self, parent)
+class BlockHashIndex(Index[bytes]):
+    def __init__(self, parent: Optional[Index[bytes]] = None, backend: Optional[Backend] = None):
+        Index.__init__(self, parent, backend)
 
     def _serialize_key(self, key: str) -> bytes:
         return struct.pack("<L", int(key))
 
-    def _serialize_value(self, value: str) -> bytes:
-        return bytes.fromhex(value)
+    def _serialize_value(self, value: bytes) -> bytes:
+        return value
 
     def _deserialize_key(self, key: bytes) -> str:
         return str(struct.unpack("<L", key)[0])
 
-    def _deserialize_value(self, value: bytes) -> str:
-        return value.hex()
+    def _deserialize_value(self, value: bytes) -> bytes:
+        return value
+
+
+class BloomIndex(Index[BloomFilter]):
+    def __init__(self, parent: Optional[Index[BloomFilter]] = None, backend: Optional[Backend] = None):
+        Index.__init__(self, parent, backend)
+
+    def _serialize_key(self, key: bytes) -> bytes:
+        return key
+
+    def _serialize_value(self, value: BloomFilter) -> bytes:
+        return value.serialize()
+
+    def _deserialize_key(self, key: bytes) -> bytes:
+        return key
+
+    def _deserialize_value(self, value: bytes) -> BloomFilter:
+        return BloomFilter.deserialize(value)
 
 
 class StateIndex(Index[Dict[str, int]]):
-    def __init__(self, parent: Optional[Index[Dict[str, int]]] = None):
-        Index.__init__(self, parent)
+    def __init__(self, parent: Optional[Index[Dict[str, int]]] = None, backend: Optional[Backend] = None):
+        Index.__init__(self, parent, backend)
 
-    def set(self, key: str, value: Dict[str, int]) -> None:
+    def set(self, key: bytes, value: Dict[str, int]) -> None:
         if not validate_address(key):
             raise Exception("Address not valid")
         Index.set(self, key, value)
 
-    def init_account(self, address: str, balance: int = 0, nonce: int = 0) -> None:
+    def init_account(self, address: bytes, balance: int = 0, nonce: int = 0) -> None:
         self.set(address, {
             "balance": balance,
             "nonce": nonce
         })
 
-    def get_balance(self, address: str) -> int:
+    def get_balance(self, address: bytes) -> int:
         account = self.get(address)
         if account is None:
             return 0
         return account["balance"]
 
-    def get_nonce(self, address: str) -> int:
+    def get_nonce(self, address: bytes) -> int:
         account = self.get(address)
         if account is None:
             return 0
         return account["nonce"]
 
-    def set_balance(self, address: str, balance: int) -> None:
+    def set_balance(self, address: bytes, balance: int) -> None:
         account = self.get(address)
         if account is None:
             self.init_account(address, balance)
             return
-        account["balance"] = balance
-        self.set(address, account)
+        # accounts are replaced, never mutated, so parent indexes stay intact
+        self.init_account(address, balance, account["nonce"])
 
-    def set_nonce(self, address: str, nonce: int) -> None:
+    def set_nonce(self, address: bytes, nonce: int) -> None:
         account = self.get(address)
         if account is None:
             self.init_account(address, 0, nonce)
             return
-        account["nonce"] = nonce
-        self.set(address, account)
+        self.init_account(address, account["balance"], nonce)
 
-    def _serialize_key(self, key: str) -> bytes:
-        return bytes.fromhex(key)
+    def _serialize_key(self, key: bytes) -> bytes:
+        return key
 
     def _serialize_value(self, value: Dict[str, int]) -> bytes:
         return struct.pack("<HQ", value["nonce"], value["balance"])
 
-    def _deserialize_key(self, key: bytes) -> str:
-        return key.hex()
+    def _deserialize_key(self, key: bytes) -> bytes:
+        return key
 
     def _deserialize_value(self, value: bytes) -> Dict[str, int]:
         (nonce, balance) = struct.unpack("<HQ", value)
@@ -175,6 +212,50 @@ class StateIndex(Index[Dict[str, int]]):
         }
 
 
+def read_records(file: str) -> Iterator[Tuple[bytes, bytes]]:
+    """Reads serialized keys and values of a saved index one by one, in order
+
+    Files starting with file_magic frame records with varint sizes, older
+    files without it use "<BH" record headers.
+    """
+    with open(file, "rb") as f:
+        if f.read(len(file_magic)) != file_magic:
+            f.seek(0)
+            line_header = f.read(3)
+            while line_header != b"":
+                (key_size, value_size) = struct.unpack("<BH", line_header)
+                key = f.read(key_size)
+                value = f.read(value_size)
+                yield (key, value)
+                line_header = f.read(3)
+            return
+        while True:
+            key_size = _read_varint(f)
+            if key_size is None:
+                return
+            value_size = _read_varint(f)
+            key = f.read(key_size)
+            value = f.read(value_size)
+            if value_size is None or len(key) != key_size or len(value) != value_size:
+                raise Exception("Truncated index file")
+            yield (key, value)
+
+
+def _read_varint(f: BinaryIO) -> Optional[int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = f.read(1)
+        if byte == b"":
+            if shift > 0:
+                raise Exception("Truncated index file")
+            return None
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
 def index_merge(base: Index[T], new: Index[T]) -> Index[T]:
     for key in new.keys():
         base.set(key, new.get(key))
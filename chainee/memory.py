@@ -0,0 +1,95 @@
+from collections import deque
+import sys
+import tracemalloc
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+# shared by everything, not owned by any object being measured
+_skipped_types = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+
+
+def deep_size(root: Any) -> Tuple[int, Dict[str, int]]:
+    """Approximates memory taken by an object and everything it references
+
+    Objects referenced several times are counted once. Attribute dicts are
+    counted with their objects, so a Block includes its own fields but not
+    its transactions, which are reported as Transaction.
+
+    Returns:
+        size (int): Bytes taken by all reachable objects
+        types (Dict[str, int]): Bytes by type name, largest first
+    """
+    seen = set()
+    types: Dict[str, int] = {}
+    size = 0
+    stack = [root]
+    while len(stack) > 0:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _skipped_types):
+            continue
+        seen.add(id(obj))
+        obj_size = sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        attributes = getattr(obj, "__dict__", None)
+        if isinstance(attributes, dict) and id(attributes) not in seen:
+            seen.add(id(attributes))
+            obj_size += sys.getsizeof(attributes)
+            stack.extend(attributes.values())
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+        size += obj_size
+        name = type(obj).__name__
+        types[name] = types.get(name, 0) + obj_size
+    return (size, dict(sorted(types.items(), key=lambda item: -item[1])))
+
+
+class AllocationTracker:
+    """Reports allocation sites that grew between two calls, using tracemalloc
+
+    Tracing slows down the whole process, so it only runs between start()
+    and stop().
+    """
+    def __init__(self):
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def is_tracing(self) -> bool:
+        return tracemalloc.is_tracing() and self._snapshot is not None
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ])
+
+    def start(self, frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._snapshot = self._take_snapshot()
+
+    def diff(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Compares allocations with the previous call, or with start()
+
+        Returns:
+            sites (List[Dict[str, Any]]): Allocation sites with the largest
+                growth, as file:line with size and count of live blocks
+        """
+        if not self.is_tracing():
+            raise Exception("Allocation tracing not started")
+        snapshot = self._take_snapshot()
+        stats = snapshot.compare_to(self._snapshot, "lineno")
+        self._snapshot = snapshot
+        return [{
+            "site": "%s:%d" % (stat.traceback[0].filename, stat.traceback[0].lineno),
+            "size": stat.size,
+            "size_diff": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        } for stat in stats[:limit]]
+
+    def stop(self) -> None:
+        self._snapshot = None
+        tracemalloc.stop()
@@ -4,8 +4,8 @@ import json
 import os
 import sys
 import traceback
-from chainee.blockchain import Blockchain
-from chainee.block import Block
+from chainee.cache import ResponseCache
+from chainee.memory import AllocationTracker, deep_size
 
 intro_message = """
    _____ _    _          _____ _   _ ______ ______
@@ -17,27 +17,81 @@ intro_message = """
 
 Type in 'help' for list of available commands"""
 
+# most blocks or headers returned by one getblocks or getheaders call
+max_page_size = 1000
+
+# rendered getblock and gettransaction responses, committed blocks never change
+response_cache = ResponseCache(64 * 2 ** 20)
+
+# tracemalloc snapshots compared by getmemoryinfo diff
+allocation_tracker = AllocationTracker()
+
+# indexes measured by getmemoryinfo
+memory_indexes = [
+    "block_index", "block_hash_index", "state_index", "transaction_index", "bloom_index", "sender_index", "state_history",
+]
+
 help_message = """List of commands:
-getaccount <adddress>   Prints balance and nonce
+getaccount <adddress> [<height>]
+                        Prints balance and nonce, at the tip or after block at height
 getblock <hash>         Prints content of a block
 getblockcount           Prints number of blocks in chain
 getblockhash <index>    Prints hash of a block by index
-getinfo                 Prints info about blockchain state
+getcacheinfo            Prints hit rate and memory use of response cache
+getblocks <from> <count> [json|hex]
+                        Prints blocks one per line, followed by cursor of next page
+getexecutioninfo <hash> Prints parallelism found in a recent block
+getheaders <from> <count> [json|hex]
+                        Prints block headers one per line, followed by cursor of next page
+getinfo                 Prints block count, tip, supply and funded accounts
+getmemoryinfo [start|diff [<count>]|stop]
+                        Prints approximate memory used by indexes, or starts, compares
+                        and stops tracemalloc snapshots of top allocation sites
+getrichlist <count>     Prints richest accounts with their balances
 gettransaction <id>     Prints content of transaction
 help                    Prints help
+scanblocks <address> <from> <to>
+                        Prints hashes of blocks touching an address
 stop                    Stops node
 submitblock <data>      Pushes block into chain"""
 
 
 def get_account_handler(blockchain, args):
+    address = bytes.fromhex(args[0])
+    if len(args) > 1:
+        account = blockchain.get_account_at(address, int(args[1]))
+        print({
+            "balance": account["balance"] if account is not None else 0,
+            "nonce": account["nonce"] if account is not None else 0,
+        })
+        return
     print({
-        "balance": blockchain.get_balance(args[0]),
-        "nonce": blockchain.get_nonce(args[0]),
+        "balance": blockchain.get_balance(address),
+        "nonce": blockchain.get_nonce(address),
     })
 
 
+def render_block_response(block_hash, block):
+    return json.dumps(block.to_dict(block_hash), indent=4)
+
+
+def render_transaction_response(transaction):
+    return json.dumps(transaction.to_dict(), indent=4)
+
+
+def cache_block_responses(block_hash, block, state):
+    response_cache.put(("block", block_hash), render_block_response(block_hash, block))
+    for transaction in block.transactions:
+        response_cache.put(("transaction", transaction.id()), render_transaction_response(transaction))
+
+
 def get_block_handler(blockchain, args):
-    print(json.dumps(blockchain.get_block(args[0]).to_dict(), indent=4))
+    block_hash = bytes.fromhex(args[0])
+    response = response_cache.get(("block", block_hash))
+    if response is None:
+        response = render_block_response(block_hash, blockchain.get_block(block_hash))
+        response_cache.put(("block", block_hash), response)
+    print(response)
 
 
 def get_block_count_handler(blockchain, args):
@@ -45,27 +99,137 @@ def get_block_count_handler(blockchain, args):
 
 
 def get_block_hash_handler(blockchain, args):
-    print(blockchain.get_block_hash(int(args[0])))
+    block_hash = blockchain.get_block_hash(int(args[0]))
+    print(block_hash.hex() if block_hash is not None else None)
+
+
+def print_page(blockchain, args, render):
+    start = int(args[0])
+    count = min(int(args[1]), max_page_size)
+    if count < 1:
+        raise Exception("Invalid count")
+    output_format = args[2].lower() if len(args) > 2 else "json"
+    if output_format not in ["json", "hex"]:
+        raise Exception("Unknown format")
+    next_start = max(start, 0)
+    for (block_hash, block) in blockchain.get_blocks(start, count):
+        sys.stdout.write(render(block_hash, block, output_format) + "\n")
+        next_start = block.number + 1
+    cursor = next_start if next_start < blockchain.block_count else None
+    print(json.dumps({"next": cursor}, separators=(",", ":")))
+
+
+def render_block(block_hash, block, output_format):
+    if output_format == "hex":
+        return block.serialize().hex()
+    return json.dumps(block.to_dict(block_hash), separators=(",", ":"))
+
+
+def render_header(block_hash, block, output_format):
+    if output_format == "hex":
+        return block.serialize(False).hex()
+    return json.dumps(block.header_to_dict(block_hash), separators=(",", ":"))
+
+
+def get_blocks_handler(blockchain, args):
+    print_page(blockchain, args, render_block)
+
+
+def get_headers_handler(blockchain, args):
+    print_page(blockchain, args, render_header)
+
+
+def get_cache_info_handler(blockchain, args):
+    print(json.dumps(response_cache.to_dict(), indent=4))
+
+
+def get_execution_info_handler(blockchain, args):
+    stats = blockchain.execution_stats.get(bytes.fromhex(args[0]))
+    if stats is None:
+        print("No execution info for block, only latest blocks executed with workers have it")
+        return
+    print(json.dumps(stats.to_dict(), indent=4))
+
+
+def get_memory_info_handler(blockchain, args):
+    action = args[0].lower() if len(args) > 0 else ""
+    if action == "start":
+        allocation_tracker.start()
+        print("Allocation tracing started")
+        return
+    if action == "stop":
+        allocation_tracker.stop()
+        print("Allocation tracing stopped")
+        return
+    if action == "diff":
+        limit = int(args[1]) if len(args) > 1 else 10
+        print(json.dumps(allocation_tracker.diff(limit), indent=4))
+        return
+    if action != "":
+        raise Exception("Unknown action")
+    indexes = {}
+    for name in memory_indexes:
+        index = getattr(blockchain, name)
+        if index is None:
+            continue
+        (size, types) = deep_size(index)
+        indexes[name] = {"entries": index.count(), "size": size, "types": types}
+    (cache_size, _) = deep_size(response_cache)
+    print(json.dumps({
+        "indexes": indexes,
+        "response_cache": cache_size,
+        "total": sum(index["size"] for index in indexes.values()) + cache_size,
+        "tracing": allocation_tracker.is_tracing(),
+    }, indent=4))
 
 
 def get_info_handler(blockchain, args):
-    print("not implemented")
+    tip = blockchain.get_block_hash(blockchain.block_count - 1)
+    info = {
+        "blocks": blockchain.block_count,
+        "tip": tip.hex() if tip is not None else None,
+    }
+    info.update(blockchain.balance_stats.to_dict())
+    print(json.dumps(info, indent=4))
+
+
+def get_rich_list_handler(blockchain, args):
+    count = min(int(args[0]), max_page_size)
+    print(json.dumps([
+        {"address": address.hex(), "balance": balance}
+        for (address, balance) in blockchain.balance_stats.top(count)
+    ], indent=4))
 
 
 def get_transaction_handler(blockchain, args):
-    print(json.dumps(blockchain.get_transaction(args[0]).to_dict(), indent=4))
+    id = bytes.fromhex(args[0])
+    response = response_cache.get(("transaction", id))
+    if response is None:
+        response = render_transaction_response(blockchain.get_transaction(id))
+        response_cache.put(("transaction", id), response)
+    print(response)
 
 
 def help_handler(blockchain, args):
     print(help_message)
 
 
+def scan_blocks_handler(blockchain, args):
+    (hashes, skipped) = blockchain.scan_blocks(bytes.fromhex(args[0]), int(args[1]), int(args[2]))
+    print(json.dumps({
+        "blocks": [block_hash.hex() for block_hash in hashes],
+        "skipped": skipped,
+    }, indent=4))
+
+
 def stop_handler(blockchain, args):
     blockchain.save()
+    blockchain.close()
     exit(0)
 
 
 def submit_block_handler(blockchain, args):
+    from chainee.block import Block
     block = Block.deserialize(bytes.fromhex(args[0]))
     blockchain.add_block(block)
 
@@ -75,9 +239,16 @@ commands = {
     "getblock": get_block_handler,
     "getblockcount": get_block_count_handler,
     "getblockhash": get_block_hash_handler,
+    "getblocks": get_blocks_handler,
+    "getcacheinfo": get_cache_info_handler,
+    "getexecutioninfo": get_execution_info_handler,
+    "getheaders": get_headers_handler,
     "getinfo": get_info_handler,
+    "getmemoryinfo": get_memory_info_handler,
+    "getrichlist": get_rich_list_handler,
     "gettransaction": get_transaction_handler,
     "help": help_handler,
+    "scanblocks": scan_blocks_handler,
     "stop": stop_handler,
     "submitblock": submit_block_handler,
 }
@@ -106,19 +277,53 @@ def main():
     for key in config_parser["DEFAULT"]:
         config[key] = config_parser["DEFAULT"][key]
 
-    blockchain = Blockchain({
+    # imported after argument and config checks, so failing early stays fast
+    from chainee.blockchain import Blockchain
+    from chainee.block import Block
+
+    blockchain_config = {
         "datadir": os.path.abspath(args.datadir),
-    })
-    blockchain.load()
+    }
+    if "bloomfalsepositiverate" in config:
+        blockchain_config["bloomfalsepositiverate"] = float(config["bloomfalsepositiverate"])
+    if "storage" in config:
+        blockchain_config["storage"] = config["storage"]
+    if "statestore" in config:
+        blockchain_config["statestore"] = config["statestore"]
+    if "statecachesize" in config:
+        blockchain_config["statecachesize"] = int(config["statecachesize"])
+    if "loadqueuedepth" in config:
+        blockchain_config["loadqueuedepth"] = int(config["loadqueuedepth"])
+    if "assumevalid" in config:
+        blockchain_config["assumevalid"] = config["assumevalid"]
+    if "historyretention" in config:
+        blockchain_config["historyretention"] = int(config["historyretention"])
+    if "executionworkers" in config:
+        blockchain_config["executionworkers"] = int(config["executionworkers"])
+    blockchain = Blockchain(blockchain_config)
+    load_stats = blockchain.load()
+    if len(load_stats) > 0:
+        print("Loaded %d blocks (%s)" % (load_stats[-1].items, ", ".join(
+            "%s %.0f/s" % (stage.name, stage.throughput()) for stage in load_stats
+        )))
     if blockchain.block_count < 1:
         blockchain.add_block(Block(
             0,
-            "0" * 64,
-            config["genesisbenficiary"],
+            bytes(32),
+            bytes.fromhex(config["genesisbenficiary"]),
             2 ** 32 - 1,
             int(config["genesistimestamp"]),
             0,
         ))
+    if "responsecachesize" in config:
+        response_cache.max_size = int(config["responsecachesize"])
+    # blocks replayed on startup are cached only once requested
+    blockchain.add_listener(cache_block_responses)
+    if "eventsocket" in config:
+        from chainee.events import EventServer, default_queue_size
+        event_server = EventServer(config["eventsocket"], int(config.get("eventqueuesize", default_queue_size)))
+        event_server.start()
+        blockchain.add_listener(event_server.publish)
 
     print(intro_message)
     while True:
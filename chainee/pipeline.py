@@ -0,0 +1,134 @@
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# marks the end of the stream in stage queues
+_END = object()
+
+
+class StageStats:
+    """
+    Args:
+        name (str): Name of the stage
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+
+    def throughput(self) -> float:
+        """Items per second of time spent in the stage itself"""
+        if self.busy <= 0:
+            return 0.0
+        return self.items / self.busy
+
+    def to_dict(self) -> Dict[str, Any]:
+        dt = self.__dict__.copy()
+        dt["throughput"] = self.throughput()
+        return dt
+
+
+def _put(queue: Queue, item: Any, stop: Event) -> bool:
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _get(queue: Queue, stop: Event) -> Any:
+    while not stop.is_set():
+        try:
+            return queue.get(timeout=0.1)
+        except Empty:
+            pass
+    return _END
+
+
+def run_pipeline(source: Iterable, stages: List[Tuple[str, Callable[[Any], Any]]], depth: int) -> List[StageStats]:
+    """Passes items through stages running concurrently, connected by bounded queues
+
+    First stage is the source, each of the following stages runs on its own
+    thread except the last one, which runs on the calling thread. At most
+    depth items wait between two stages, so memory does not depend on length
+    of the source. Order of items is preserved. The first error raised by
+    any stage stops the pipeline and is raised again here.
+
+    Args:
+        source (Iterable): Items entering the pipeline, read by first stage
+        stages: Names and functions of stages, first one is the source name
+            and its function is ignored
+        depth (int): Capacity of each queue between stages
+
+    Returns:
+        stats (List[StageStats]): Items processed and time spent per stage
+    """
+    stats = [StageStats(name) for (name, _) in stages]
+    queues: List[Queue] = [Queue(maxsize=depth) for _ in stages[1:]]
+    stop = Event()
+    errors: List[BaseException] = []
+
+    def read() -> None:
+        iterator = iter(source)
+        try:
+            while True:
+                start = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats[0].busy += perf_counter() - start
+                stats[0].items += 1
+                if not _put(queues[0], item, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        _put(queues[0], _END, stop)
+
+    def work(i: int) -> None:
+        function = stages[i][1]
+        while True:
+            item = _get(queues[i - 1], stop)
+            if item is _END:
+                break
+            start = perf_counter()
+            try:
+                item = function(item)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+                return
+            stats[i].busy += perf_counter() - start
+            stats[i].items += 1
+            if not _put(queues[i], item, stop):
+                return
+        _put(queues[i], _END, stop)
+
+    threads = [Thread(target=read, daemon=True)]
+    for i in range(1, len(stages) - 1):
+        threads.append(Thread(target=work, args=(i,), daemon=True))
+    for thread in threads:
+        thread.start()
+    last = len(stages) - 1
+    try:
+        while True:
+            item = _get(queues[last - 1], stop)
+            if item is _END:
+                break
+            start = perf_counter()
+            stages[last][1](item)
+            stats[last].busy += perf_counter() - start
+            stats[last].items += 1
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if len(errors) > 0:
+        raise errors[0]
+    return stats
@@ -0,0 +1,189 @@
+from bisect import bisect_left
+from collections import deque
+from threading import Lock
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+from .block import Block
+from .transaction import Transaction
+
+if TYPE_CHECKING:
+    from .blockchain import Blockchain
+
+Account = Optional[Dict[str, int]]
+
+
+class StateHistory:
+    """Undo log of account state, lets readers see state as of an older block count
+
+    Before a block is merged into the state, the previous account of every
+    address it changes is recorded under the block number. A reader pinned
+    at block count n reads the current account first and then looks for
+    the oldest record of a block numbered n or above. When there is one, the
+    account was changed after the pin and the recorded one is returned.
+    Records are appended before the merge, so a reader seeing a merged
+    account always finds its record.
+
+    The same records answer queries of state at past heights, as long as
+    they were not pruned. Records no pinned reader needs any more are
+    dropped by prune(), which moves the start of the list of each address
+    past them and copies the list only once half of it was dropped. Records
+    are appended in place and start and list are replaced together, so
+    readers never lock. Only the thread adding blocks calls record() and
+    prune().
+
+    Args:
+        oldest (int): Number of the first block recorded, history of older
+            blocks is not available
+    """
+    def __init__(self, oldest: int = 0):
+        self.oldest = oldest
+        # first record still kept and records ordered by block number, by address
+        self._records: Dict[bytes, Tuple[int, List[Tuple[int, Account]]]] = {}
+        # addresses changed by every recorded block, oldest first
+        self._blocks: Deque[Tuple[int, List[bytes]]] = deque()
+        self._pins: Dict[int, int] = {}
+        self._lock = Lock()
+
+    def record(self, number: int, accounts: Dict[bytes, Account]) -> None:
+        """Stores accounts as they were before block with given number"""
+        for (address, account) in accounts.items():
+            entry = self._records.get(address)
+            if entry is None:
+                self._records[address] = (0, [(number, account)])
+            else:
+                entry[1].append((number, account))
+        self._blocks.append((number, list(accounts.keys())))
+
+    def account(self, address: bytes, block_count: int, current: Account) -> Account:
+        entry = self._records.get(address)
+        if entry is None:
+            return current
+        (start, records) = entry
+        i = bisect_left(records, (block_count,), start)
+        if i == len(records):
+            return current
+        return records[i][1]
+
+    def count(self) -> int:
+        """Number of records kept"""
+        return sum(len(records) - start for (start, records) in list(self._records.values()))
+
+    def pin(self, blockchain: 'Blockchain') -> int:
+        """Registers a reader at the current block count and returns the count"""
+        with self._lock:
+            block_count = blockchain.block_count
+            self._pins[block_count] = self._pins.get(block_count, 0) + 1
+            return block_count
+
+    def release(self, block_count: int) -> None:
+        with self._lock:
+            self._pins[block_count] -= 1
+            if self._pins[block_count] == 0:
+                del self._pins[block_count]
+
+    def pinned(self) -> int:
+        """Number of readers still pinned"""
+        with self._lock:
+            return sum(self._pins.values())
+
+    def prune(self, block_count: int) -> None:
+        """Drops records of blocks numbered below block_count, unless a reader is pinned before them"""
+        with self._lock:
+            oldest = min(list(self._pins.keys()) + [block_count])
+            self.oldest = max(self.oldest, oldest)
+        addresses = set()
+        while len(self._blocks) > 0 and self._blocks[0][0] < oldest:
+            addresses.update(self._blocks.popleft()[1])
+        for address in addresses:
+            entry = self._records.get(address)
+            if entry is None:
+                continue
+            (start, records) = entry
+            start = bisect_left(records, (oldest,), start)
+            if start == len(records):
+                del self._records[address]
+            elif start * 2 >= len(records):
+                self._records[address] = (0, records[start:])
+            else:
+                self._records[address] = (start, records)
+
+
+class ChainSnapshot:
+    """Read-only view of the chain pinned at a block count
+
+    Blocks added after the snapshot was taken are not visible, neither are
+    their effects on account state, even while they are being applied.
+    Blocks, hashes and transactions are only ever added, so they are read
+    directly and filtered by block number. Snapshot must be closed, open
+    snapshots keep state history from being pruned.
+
+    Args:
+        blockchain (Blockchain): Chain to read from
+    """
+    def __init__(self, blockchain: 'Blockchain'):
+        self._blockchain = blockchain
+        self._history = blockchain.state_history
+        self.block_count = self._history.pin(blockchain)
+        self.closed = False
+
+    def __enter__(self) -> 'ChainSnapshot':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._history.release(self.block_count)
+
+    def get_block_hash(self, number: int) -> Optional[bytes]:
+        if number >= self.block_count:
+            return None
+        return self._blockchain.get_block_hash(number)
+
+    def get_block(self, hash: bytes) -> Optional[Block]:
+        block = self._blockchain.get_block(hash)
+        if block is None or block.number >= self.block_count:
+            return None
+        return block
+
+    def get_latest_block(self) -> Optional[Block]:
+        hash = self.get_block_hash(self.block_count - 1)
+        if hash is None:
+            return None
+        return self.get_block(hash)
+
+    def get_blocks(self, start: int, count: int) -> List[Tuple[bytes, Block]]:
+        blocks = []
+        for number in range(max(start, 0), min(start + count, self.block_count)):
+            block_hash = self.get_block_hash(number)
+            blocks.append((block_hash, self._blockchain.get_block(block_hash)))
+        return blocks
+
+    def get_transaction(self, id: bytes) -> Optional[Transaction]:
+        block_hash = self._blockchain.transaction_index.get(id)
+        if block_hash is None:
+            return None
+        block = self.get_block(block_hash)
+        if block is None:
+            return None
+        for transaction in block.transactions:
+            if transaction.id() == id:
+                return transaction
+        return None
+
+    def get_account(self, address: bytes) -> Account:
+        current = self._blockchain.state_index.get(address)
+        return self._history.account(address, self.block_count, current)
+
+    def get_balance(self, address: bytes) -> int:
+        account = self.get_account(address)
+        if account is None:
+            return 0
+        return account["balance"]
+
+    def get_nonce(self, address: bytes) -> int:
+        account = self.get_account(address)
+        if account is None:
+            return 0
+        return account["nonce"]
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+import mmap
+import os
+from struct import pack, unpack
+from threading import RLock
+from typing import Iterator, List, Optional, Set, Tuple
+from .storage import Backend
+
+# address followed by the "<HQ" nonce and balance of StateIndex
+record_size = 30
+key_size = 20
+# magic, record count, capacity and number of blocks the state belongs to
+header_format = "<4sIQQ"
+header_size = 24
+magic = b"CHS2"
+# block count written while records are being flushed, so a crash in the
+# middle leaves a table that matches no chain
+flushing = 2 ** 64 - 1
+empty_record = bytes(record_size)
+max_load_factor = 0.7
+
+
+class HashedStateStore(Backend):
+    """Account state in an mmap-backed open-addressing hash table on disk
+
+    Every slot holds one fixed size record, addresses are hashes already, so
+    their first bytes are used as the slot number directly. Collisions are
+    resolved by linear probing and the table doubles before it gets more than
+    70% full.
+
+    Zeroed record marks an empty slot. An account never returns to zero nonce
+    and zero balance, because lowering the balance always increments the
+    nonce, so only the zero address with an empty account cannot be stored,
+    which is the same as not storing it.
+
+    Recently used accounts are kept in a write-back cache and written into
+    the table when evicted or flushed. Calls are serialized by a lock, as
+    the parallel executor reads state from several threads.
+
+    The header holds the number of blocks applied to the state, set by the
+    chain before every flush. It lets the chain detect a table that got
+    ahead of its own storage, or was left half-written by a crash.
+
+    Args:
+        file (str): Path to table file, created when it does not exist
+        capacity (int): Initial number of slots, rounded up to power of two
+        cache_size (int): Number of accounts kept in the cache
+        truncate (bool): Start with empty table even if the file exists
+    """
+    serialized = True
+
+    def __init__(self, file: str, capacity: int = 1 << 16, cache_size: int = 1 << 14, truncate: bool = False):
+        self.file = file
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.block_count = 0
+        self._cache: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        # cached keys not written into the table yet
+        self._dirty: Set[bytes] = set()
+        # header holds block_count, no record was written since
+        self._consistent = True
+        self._lock = RLock()
+        if truncate or not os.path.exists(file):
+            size = 1
+            while size < capacity:
+                size <<= 1
+            self._create(file, size)
+        self._open()
+
+    @staticmethod
+    def _create(file: str, capacity: int) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(file)), exist_ok=True)
+        with open(file, "wb") as f:
+            f.write(pack(header_format, magic, 0, capacity, 0))
+            f.truncate(header_size + capacity * record_size)
+
+    def _open(self) -> None:
+        self._file = open(self.file, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        (file_magic, self._count, self._capacity, self.block_count) = unpack(header_format, self._map[:header_size])
+        if file_magic != magic:
+            raise Exception("Not a state store file")
+        self._mask = self._capacity - 1
+
+    def _write_header(self, block_count: int) -> None:
+        self._map[:header_size] = pack(header_format, magic, self._count, self._capacity, block_count)
+        self._map.flush(0, min(mmap.PAGESIZE, len(self._map)))
+
+    def _close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+    def _find(self, key: bytes) -> Tuple[int, bool]:
+        """
+        Returns:
+            offset (int): Offset of the record holding the key, or of the empty
+                slot where it belongs
+            found (bool): Key is stored in the table
+        """
+        slot = int.from_bytes(key[:8], "little") & self._mask
+        while True:
+            offset = header_size + slot * record_size
+            record = self._map[offset:(offset + record_size)]
+            if record == empty_record:
+                return (offset, False)
+            if record[:key_size] == key:
+                return (offset, True)
+            slot = (slot + 1) & self._mask
+
+    def _read(self, key: bytes) -> Optional[bytes]:
+        (offset, found) = self._find(key)
+        if not found:
+            return None
+        return self._map[(offset + key_size):(offset + record_size)]
+
+    def _write(self, key: bytes, value: bytes) -> None:
+        if self._consistent:
+            self._write_header(flushing)
+            self._consistent = False
+        record = key + value
+        (offset, found) = self._find(key)
+        if record == empty_record:
+            if found:
+                raise Exception("Account cannot be reset to empty")
+            return
+        if not found:
+            if self._count + 1 > self._capacity * max_load_factor:
+                self._grow()
+                (offset, _) = self._find(key)
+            self._count += 1
+        self._map[offset:(offset + record_size)] = record
+
+    def _grow(self) -> None:
+        records = list(self._records())
+        block_count = self.block_count
+        self._close()
+        temp_file = self.file + ".tmp"
+        self._create(temp_file, self._capacity * 2)
+        os.replace(temp_file, self.file)
+        self._open()
+        self.block_count = block_count
+        self._write_header(flushing)
+        for record in records:
+            (offset, _) = self._find(record[:key_size])
+            self._map[offset:(offset + record_size)] = record
+        self._count = len(records)
+
+    def _records(self) -> Iterator[bytes]:
+        for slot in range(self._capacity):
+            offset = header_size + slot * record_size
+            record = self._map[offset:(offset + record_size)]
+            if record != empty_record:
+                yield record
+
+    def _cache_put(self, key: bytes, value: bytes) -> None:
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            (evicted_key, evicted_value) = self._cache.popitem(last=False)
+            if evicted_key in self._dirty:
+                self._dirty.discard(evicted_key)
+                self._write(evicted_key, evicted_value)
+
+    def keys(self) -> List[bytes]:
+        with self._lock:
+            self.flush()
+            return [record[:key_size] for record in self._records()]
+
+    def contains(self, key: bytes) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return cached
+            self.misses += 1
+            value = self._read(key)
+            if value is not None:
+                self._cache_put(key, value)
+            return value
+
+    def set(self, key: bytes, value: bytes) -> None:
+        with self._lock:
+            self._dirty.add(key)
+            self._cache_put(key, value)
+
+    def count(self) -> int:
+        with self._lock:
+            self.flush()
+            return self._count
+
+    def flush(self) -> None:
+        """Writes dirty accounts into the table, the header last"""
+        with self._lock:
+            for key in self._dirty:
+                self._write(key, self._cache[key])
+            self._dirty.clear()
+            self._map.flush()
+            self._write_header(self.block_count)
+            self._consistent = True
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._close()
@@ -0,0 +1,156 @@
+from contextlib import contextmanager
+import os
+import sqlite3
+from threading import RLock
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Backend:
+    """Stores entries of an index
+
+    Backends with serialized set to True receive keys and values already
+    serialized to bytes by the index, others receive the objects themselves.
+    """
+    serialized = False
+
+    def keys(self) -> List[Any]:
+        raise NotImplementedError()
+
+    def contains(self, key: Any) -> bool:
+        raise NotImplementedError()
+
+    def get(self, key: Any) -> Optional[Any]:
+        raise NotImplementedError()
+
+    def set(self, key: Any, value: Any) -> None:
+        raise NotImplementedError()
+
+    def count(self) -> int:
+        raise NotImplementedError()
+
+    def flush(self) -> None:
+        """Writes out entries the backend buffers, if any"""
+        pass
+
+
+class MemoryBackend(Backend):
+    def __init__(self):
+        self._entries: Dict[Any, Any] = {}
+
+    def keys(self) -> List[Any]:
+        return list(self._entries.keys())
+
+    def contains(self, key: Any) -> bool:
+        return key in self._entries
+
+    def get(self, key: Any) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def set(self, key: Any, value: Any) -> None:
+        self._entries[key] = value
+
+    def count(self) -> int:
+        return len(self._entries)
+
+
+class MemoryStorage:
+    """Keeps indexes in memory, nothing survives the process"""
+    persistent = False
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        yield
+
+    def backend(self, table: str) -> MemoryBackend:
+        return MemoryBackend()
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStorage:
+    """Database file shared by SQLite backends of all indexes
+
+    Runs in WAL mode, so readers are not blocked by a block being written.
+    Writes between transaction() enter and exit are committed together.
+
+    Args:
+        file (str): Path to database file
+    """
+    persistent = True
+
+    def __init__(self, file: str):
+        os.makedirs(os.path.dirname(os.path.abspath(file)), exist_ok=True)
+        # statements are compiled once and reused from the statement cache
+        self._connection = sqlite3.connect(file, isolation_level=None, check_same_thread=False, cached_statements=64)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._lock = RLock()
+        self._depth = 0
+
+    def execute(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Groups writes into one SQLite transaction, nested calls join the outer one
+
+        Only one thread writes, but others may keep reading through the
+        shared connection meanwhile, so the lock is not held in between.
+        """
+        if self._depth == 0:
+            self.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self.execute("ROLLBACK")
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            self.execute("COMMIT")
+
+    def backend(self, table: str) -> 'SQLiteBackend':
+        return SQLiteBackend(self, table)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class SQLiteBackend(Backend):
+    """
+    Args:
+        storage (SQLiteStorage): Database the table is in
+        table (str): Name of table with the entries
+    """
+    serialized = True
+
+    def __init__(self, storage: SQLiteStorage, table: str):
+        self._storage = storage
+        storage.execute("CREATE TABLE IF NOT EXISTS %s (key BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID" % table)
+        self._select_keys = "SELECT key FROM %s" % table
+        self._select_value = "SELECT value FROM %s WHERE key = ?" % table
+        self._insert = "INSERT OR REPLACE INTO %s (key, value) VALUES (?, ?)" % table
+        self._count = "SELECT COUNT(*) FROM %s" % table
+
+    def keys(self) -> List[bytes]:
+        return [row[0] for row in self._storage.execute(self._select_keys)]
+
+    def contains(self, key: bytes) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        rows = self._storage.execute(self._select_value, (key,))
+        if len(rows) < 1:
+            return None
+        return rows[0][0]
+
+    def set(self, key: bytes, value: bytes) -> None:
+        self._storage.execute(self._insert, (key, value))
+
+    def count(self) -> int:
+        return self._storage.execute(self._count)[0][0]
@@ -0,0 +1,190 @@
+import gc
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (balance, address), ordered by balance first
+Entry = Tuple[int, bytes]
+
+max_level = 32
+
+
+class _Node:
+    __slots__ = ["entry", "next", "width"]
+
+    def __init__(self, entry: Optional[Entry], level: int):
+        self.entry = entry
+        self.next: List[Optional[_Node]] = [None] * level
+        # number of entries skipped by following next on each level
+        self.width = [1] * level
+
+
+class SortedBalances:
+    """Indexable skiplist of balances, with insert, remove and lookup by rank in O(log n)"""
+    def __init__(self, seed: int = 0):
+        self._head = _Node(None, max_level)
+        self._level = 1
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def from_sorted(entries: List[Entry], seed: int = 0) -> 'SortedBalances':
+        """Builds skiplist of entries already in ascending order in O(n)"""
+        balances = SortedBalances(seed)
+        # last node on each level and its rank, counted from 1
+        last = [balances._head] * max_level
+        last_rank = [0] * max_level
+        # nodes form no cycles, collecting while millions are allocated only
+        # rescans them and takes most of the time
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for (rank, entry) in enumerate(entries, 1):
+                level = balances._random_level()
+                balances._level = max(balances._level, level)
+                node = _Node(entry, level)
+                for i in range(level):
+                    last[i].next[i] = node
+                    last[i].width[i] = rank - last_rank[i]
+                    last[i] = node
+                    last_rank[i] = rank
+        finally:
+            if collecting:
+                gc.enable()
+        balances._size = len(entries)
+        for i in range(balances._level):
+            last[i].width[i] = balances._size + 1 - last_rank[i]
+        return balances
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < max_level and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, entry: Entry) -> None:
+        chain: List[_Node] = [self._head] * max_level
+        steps = [0] * max_level
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.next[i].entry < entry:
+                steps[i] += node.width[i]
+                node = node.next[i]
+            chain[i] = node
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                self._head.width[i] = self._size + 1
+            self._level = level
+        new = _Node(entry, level)
+        skipped = 0
+        for i in range(self._level):
+            if i < level:
+                new.next[i] = chain[i].next[i]
+                chain[i].next[i] = new
+                new.width[i] = chain[i].width[i] - skipped
+                chain[i].width[i] = skipped + 1
+            else:
+                chain[i].width[i] += 1
+            skipped += steps[i]
+        self._size += 1
+
+    def remove(self, entry: Entry) -> None:
+        chain: List[_Node] = [self._head] * max_level
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.next[i].entry < entry:
+                node = node.next[i]
+            chain[i] = node
+        found = chain[0].next[0]
+        if found is None or found.entry != entry:
+            raise KeyError(entry)
+        for i in range(self._level):
+            if chain[i].next[i] is found:
+                chain[i].width[i] += found.width[i] - 1
+                chain[i].next[i] = found.next[i]
+            else:
+                chain[i].width[i] -= 1
+        self._size -= 1
+
+    def _node_at(self, rank: int) -> _Node:
+        node = self._head
+        rank += 1
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.width[i] <= rank:
+                rank -= node.width[i]
+                node = node.next[i]
+        return node
+
+    def __getitem__(self, rank: int) -> Entry:
+        """Entry at rank in ascending order"""
+        if rank < 0:
+            rank += self._size
+        if not 0 <= rank < self._size:
+            raise IndexError(rank)
+        return self._node_at(rank).entry
+
+    def slice(self, start: int, count: int) -> List[Entry]:
+        """Up to count entries in ascending order, starting at rank start"""
+        entries = []
+        if start >= self._size or count < 1:
+            return entries
+        node = self._node_at(max(start, 0))
+        while node is not None and len(entries) < count:
+            entries.append(node.entry)
+            node = node.next[0]
+        return entries
+
+
+class BalanceStats:
+    """Supply and ordering of funded accounts, updated by balance changes of committed blocks"""
+    def __init__(self):
+        self.supply = 0
+        self.balances = SortedBalances()
+
+    def update(self, address: bytes, old_balance: int, new_balance: int) -> None:
+        if old_balance == new_balance:
+            return
+        self.supply += new_balance - old_balance
+        if old_balance > 0:
+            self.balances.remove((old_balance, address))
+        if new_balance > 0:
+            self.balances.insert((new_balance, address))
+
+    def rebuild(self, balances: Iterable[Tuple[bytes, int]]) -> None:
+        """Replaces stats with those of given balances of all accounts
+
+        Sorting and building the skiplist at once is several times faster
+        than updating with every account.
+        """
+        entries = [(balance, address) for (address, balance) in balances if balance > 0]
+        entries.sort()
+        self.supply = sum(balance for (balance, _) in entries)
+        self.balances = SortedBalances.from_sorted(entries)
+
+    def funded_accounts(self) -> int:
+        return len(self.balances)
+
+    def top(self, count: int) -> List[Tuple[bytes, int]]:
+        """Richest accounts with their balances, richest first"""
+        count = min(count, len(self.balances))
+        entries = self.balances.slice(len(self.balances) - count, count)
+        return [(address, balance) for (balance, address) in reversed(entries)]
+
+    def percentile(self, percent: float) -> int:
+        """Balance below which given percent of funded accounts are, 0 without accounts"""
+        if len(self.balances) < 1:
+            return 0
+        rank = min(int(len(self.balances) * percent / 100), len(self.balances) - 1)
+        return self.balances[rank][0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "supply": self.supply,
+            "funded_accounts": self.funded_accounts(),
+            "balance_percentiles": {
+                str(percent): self.percentile(percent) for percent in [50, 90, 99]
+            },
+        }
@@ -1,11 +1,13 @@
 from argparse import ArgumentParser
 import json
 import sys
-from chainee.block import Block
-from chainee.transaction import Transaction
-from chainee.utils import sha3, generate_private_key, get_pub_key, sign, recover, address_from_public, timestamp
+
+# Every handler imports what it needs by itself. Scripts call chainee-tools
+# in a loop, so commands like sha3 should not pay for loading block and
+# transaction code or the secp256k1 library.
 
 help_message = """chainee-tools <command> [<args>]
+       chainee-tools --batch [-workers=<n>] [-chunk=<n>] < requests
 
 List of commands:
 createblock             Creates serialized block
@@ -16,10 +18,19 @@ generateaddress         Generates new address
 recover                 Recovers address from signature
 sha3                    Calculates sha3 hash
 sign                    Signs message
+
+Batch mode reads one JSON request per line from stdin, for example
+{"command": "sign", "id": 1, "message": "abcdef", "private_key": "...", "hex": true}
+and writes one JSON response per line to stdout in the same order. Supported
+commands are createtransaction, decodeblock, decodetransaction, recover, sha3
+and sign, arguments are named as in the single commands.
 """
 
 
 def create_block_handler():
+    from chainee.block import Block
+    from chainee.transaction import Transaction
+    from chainee.utils import timestamp
     parser = ArgumentParser(description="Creates block object")
     parser.add_argument("-number", type=int, required=True)
     parser.add_argument("-parent", type=str, required=True)
@@ -32,24 +43,27 @@ def create_block_handler():
     block_timestamp = args.timestamp
     if block_timestamp is None:
         block_timestamp = timestamp()
-    block = Block(args.number, args.parent, args.beneficiary, args.target, block_timestamp, args.nonce)
+    block = Block(args.number, bytes.fromhex(args.parent), bytes.fromhex(args.beneficiary), args.target, block_timestamp, args.nonce)
     for serialized in args.transactions:
         block.add_transaction(Transaction.deserialize(bytes.fromhex(serialized)))
     print(block.serialize().hex())
 
 
 def create_transaction_handler():
+    from chainee.transaction import Transaction
     parser = ArgumentParser(description="Creates transaction object")
     parser.add_argument("-nonce", type=int, required=True)
     parser.add_argument("-out", type=str, help="{\\\"address\\\":amount,...}", required=True)
     parser.add_argument("-private_key", type=str, required=True)
     args = parser.parse_args(sys.argv[2:])
-    transaction = Transaction(args.nonce, json.loads(args.out))
+    out = {bytes.fromhex(address): amount for (address, amount) in json.loads(args.out).items()}
+    transaction = Transaction(args.nonce, out)
     transaction.sign(args.private_key)
     print(transaction.serialize().hex())
 
 
 def decode_block_handler():
+    from chainee.block import Block
     parser = ArgumentParser(description="Decodes transaction object")
     parser.add_argument("data", type=str)
     args = parser.parse_args(sys.argv[2:])
@@ -58,6 +72,7 @@ def decode_block_handler():
 
 
 def decode_transaction_handler():
+    from chainee.transaction import Transaction
     parser = ArgumentParser(description="Decodes transaction object")
     parser.add_argument("data", type=str)
     args = parser.parse_args(sys.argv[2:])
@@ -66,6 +81,7 @@ def decode_transaction_handler():
 
 
 def generate_address_handler():
+    from chainee.utils import sha3, generate_private_key, get_pub_key, address_from_public
     parser = ArgumentParser(description="Generates new address")
     parser.add_argument("-seed", type=str)
     args = parser.parse_args(sys.argv[2:])
@@ -83,6 +99,7 @@ def generate_address_handler():
 
 
 def recover_handler():
+    from chainee.utils import recover
     parser = ArgumentParser(description="Recovers address from signature and original message")
     parser.add_argument("message", type=str)
     parser.add_argument("signature", type=str)
@@ -92,6 +109,7 @@ def recover_handler():
 
 
 def sha3_handler():
+    from chainee.utils import sha3
     parser = ArgumentParser(description="Calculates sha3")
     parser.add_argument("input", type=str)
     parser.add_argument("--hex", nargs="?", const=True, default=False)
@@ -100,6 +118,7 @@ def sha3_handler():
 
 
 def sign_handler():
+    from chainee.utils import sign
     parser = ArgumentParser(description="Calculates signature")
     parser.add_argument("message", type=str)
     parser.add_argument("-private_key", type=str, required=True)
@@ -108,6 +127,16 @@ def sign_handler():
     print(sign(args.message, args.private_key, args.hex))
 
 
+def batch_handler():
+    import os
+    from chainee.batch import run_batch
+    parser = ArgumentParser(description="Processes newline-delimited JSON requests from stdin")
+    parser.add_argument("-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-chunk", type=int, default=256)
+    args = parser.parse_args(sys.argv[2:])
+    run_batch(sys.stdin, sys.stdout, args.workers, args.chunk)
+
+
 handlers = {
     "createblock": create_block_handler,
     "createtransaction": create_transaction_handler,
@@ -129,6 +158,9 @@ def main():
     if len(sys.argv) < 2:
         parser.print_help()
         exit(1)
+    if sys.argv[1] == "--batch":
+        batch_handler()
+        return
     args = parser.parse_args([sys.argv[1]])
     if args.command not in handlers:
         print("Unrecognized command")
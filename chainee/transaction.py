@@ -1,29 +1,48 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from struct import pack, unpack
-from .utils import sign, recover, validate_address, sha3
+from .utils import sign_many, recover_many, validate_address, sha3_digest, encode_varint, decode_varint
 
 
 class Transaction:
     """
     Args:
         nonce (int): Account transaction nonce
-        out (Dict[str, int]): Outputs of the transaction
+        out (Dict[bytes, int]): Outputs of the transaction
     """
-    def __init__(self, nonce: int, out: Dict[str, int]):
+    def __init__(self, nonce: int, out: Dict[bytes, int]):
         self.nonce = nonce
-        self.out: Dict[str, int] = {}
+        self.out: Dict[bytes, int] = {}
         self.signature: Optional[bytes] = None
+        # recovered sender together with the signature it was recovered from
+        self._sender: Optional[Tuple[bytes, bytes]] = None
         for (address, amount) in out.items():
             self.set_out(address, amount)
 
-    def id(self) -> str:
-        return sha3(self.serialize())
+    def id(self) -> bytes:
+        return sha3_digest(self.serialize())
 
-    def address(self) -> Optional[str]:
+    def address(self) -> Optional[bytes]:
         if self.signature is None:
             return None
-        serialized = self.serialize(False).hex()
-        return recover(serialized, self.signature.hex())
+        if self._sender is None or self._sender[0] != self.signature:
+            self._sender = (self.signature, recover_many([(self.serialize(False), self.signature)])[0])
+        return self._sender[1]
+
+    @staticmethod
+    def recover_senders(transactions: List['Transaction']) -> None:
+        """Recovers senders not known yet in one batch, address() returns them afterwards"""
+        pending = [
+            transaction for transaction in transactions
+            if transaction.signature is not None
+            and (transaction._sender is None or transaction._sender[0] != transaction.signature)
+        ]
+        senders = recover_many([(transaction.serialize(False), transaction.signature) for transaction in pending])
+        for (transaction, sender) in zip(pending, senders):
+            transaction._sender = (transaction.signature, sender)
+
+    def assume_sender(self, address: bytes) -> None:
+        """Sets sender known from a trusted source, skipping recovery from the signature"""
+        self._sender = (self.signature, address)
 
     def value(self) -> int:
         value = 0
@@ -31,47 +50,52 @@ class Transaction:
             value += amount
         return value
 
-    def set_out(self, address: str, amount: int) -> None:
+    def set_out(self, address: bytes, amount: int) -> None:
         if not validate_address(address):
             raise Exception("Address not valid")
         if amount < 1:
             raise Exception("Amount not valid")
         self.out[address] = amount
+        self._sender = None
 
     def sign(self, private_key: str) -> None:
-        serialized = self.serialize(False).hex()
-        self.signature = bytes.fromhex(sign(serialized, private_key))
+        self.signature = sign_many([(self.serialize(False), bytes.fromhex(private_key))])[0]
 
     def to_dict(self) -> Dict[str, Any]:
-        dt = self.__dict__.copy()
-        dt["id"] = self.id()
+        dt = {key: value for (key, value) in self.__dict__.items() if not key.startswith("_")}
+        dt["id"] = self.id().hex()
+        dt["out"] = {address.hex(): amount for (address, amount) in self.out.items()}
         if dt["signature"] is not None:
-            dt["address"] = self.address()
+            dt["address"] = self.address().hex()
             dt["signature"] = dt["signature"].hex()
         return dt
 
     def serialize(self, include_signature: bool = True) -> bytes:
-        outLen = len(self.out)
-        serialized = pack("<Hb", self.nonce, outLen)
+        # varint output count is the same single byte as the former "<b" count
+        # for up to 127 outputs, so ids and signatures of those stay valid
+        serialized = [pack("<H", self.nonce), encode_varint(len(self.out))]
         for (address, amount) in self.out.items():
-            serialized += pack("<20sQ", bytes.fromhex(address), amount)
+            serialized.append(pack("<20sQ", address, amount))
         if include_signature and self.signature is not None:
-            serialized += self.signature
-        return serialized
+            serialized.append(self.signature)
+        return b"".join(serialized)
 
     @staticmethod
     def deserialize(data: bytes) -> 'Transaction':
-        (nonce, outLen) = unpack("<Hb", data[:3])
-        out: Dict[str, int] = {}
-        i = 3
-        while i < (28 * outLen + 3):
+        nonce = unpack("<H", data[:2])[0]
+        (outLen, i) = decode_varint(data, 2)
+        out: Dict[bytes, int] = {}
+        end = i + 28 * outLen
+        if end > len(data):
+            raise Exception("Truncated transaction")
+        while i < end:
             temp = data[i:(i + 28)]
             (address, amount) = unpack("<20sQ", temp)
-            out[address.hex()] = amount
+            out[address] = amount
             i += 28
         signature = None
         if len(data) > i:
-            signature = data[i:]
+            signature = bytes(data[i:])
         transaction = Transaction(nonce, out)
         transaction.signature = signature
         return transaction
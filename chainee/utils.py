@@ -1,13 +1,15 @@
-from secp256k1 import PrivateKey, PublicKey, ALL_FLAGS
 from hashlib import sha3_256
 from os import urandom
 from time import time
-from typing import List, Union
+from typing import Iterable, List, Tuple, Union
 
 hexdigits = "0123456789abcdef"
 # https://www.secg.org/sec2-v2.pdf
 n = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
 
+# secp256k1 context shared by all key objects, see secp256k1_context()
+_secp256k1_context = None
+
 
 def timestamp() -> int:
     return int(time())
@@ -17,6 +19,37 @@ def is_hex_string(input: str) -> bool:
     return all(c in hexdigits for c in input.lower())
 
 
+def encode_varint(value: int) -> bytes:
+    """Encodes unsigned integer in 7 bit groups, lowest first, values below 128 take one byte"""
+    if value < 0:
+        raise Exception("Varint must not be negative")
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def decode_varint(data: bytes, pos: int = 0) -> Tuple[int, int]:
+    """
+    Returns:
+        value (int): Decoded integer
+        pos (int): Position right after the varint
+    """
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise Exception("Truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return (value, pos)
+        shift += 7
+
+
 # TODO: Not implemented
 def unpack_target(packed_target: int) -> int:
     size = packed_target >> 24
@@ -35,8 +68,8 @@ def validate_private_key(private_key: Union[str, int]) -> bool:
     return private_key > 0 and private_key < n
 
 
-def validate_address(address: str) -> bool:
-    return is_hex_string(address) and len(address) == 40
+def validate_address(address: bytes) -> bool:
+    return type(address) == bytes and len(address) == 20
 
 
 def sha3(input: Union[bytes, str], hex: bool = True) -> str:
@@ -49,15 +82,19 @@ def sha3(input: Union[bytes, str], hex: bool = True) -> str:
     return hash.hexdigest()
 
 
-def merkle_tree_root(arr: List[str]) -> str:
-    tree = list(map(lambda e: sha3(e, is_hex_string(e)), arr))
+def sha3_digest(data: bytes) -> bytes:
+    return sha3_256(data).digest()
+
+
+def merkle_tree_root(arr: List[bytes]) -> bytes:
+    tree = [sha3_digest(e) for e in arr]
+    # single leaf is paired with itself too
     if len(tree) % 2 == 1:
         tree.append(tree[-1])
     while len(tree) > 1:
-        temp = []
-        for i in range(0, len(tree), 2):
-            temp.append(sha3(tree[i] + tree[i + 1]))
-        tree = temp
+        if len(tree) % 2 == 1:
+            tree.append(tree[-1])
+        tree = [sha3_digest(tree[i] + tree[i + 1]) for i in range(0, len(tree), 2)]
     return tree[0]
 
 
@@ -72,16 +109,42 @@ def generate_private_key() -> str:
     return hex(rand)[2:].rjust(64, '0')
 
 
+# secp256k1 is imported on first use, so commands without elliptic curve
+# operations do not pay for loading the library and creating its context
+def secp256k1_context():
+    """
+    Returns:
+        context: Persistent secp256k1 context created with all flags
+    """
+    global _secp256k1_context
+    if _secp256k1_context is None:
+        from secp256k1 import lib, ALL_FLAGS
+        _secp256k1_context = lib.secp256k1_context_create(ALL_FLAGS)
+    return _secp256k1_context
+
+
 def get_pub_key(private_key: str) -> str:
     """
     Returns:
         pub_key (str): Public key in uncompressed format without "04" prefix
     """
+    from secp256k1 import PrivateKey
     private_key = private_key.rjust(64, '0')
-    pub_key: str = PrivateKey(bytes.fromhex(private_key)).pubkey.serialize(False).hex()[2:]
+    pub_key: str = PrivateKey(bytes.fromhex(private_key), ctx=secp256k1_context()).pubkey.serialize(False).hex()[2:]
     return pub_key
 
 
+def address_from_pub_key_bytes(pub_key: bytes) -> bytes:
+    """
+    Args:
+        pub_key (bytes): Public key in uncompressed format without "04" prefix
+
+    Returns:
+        address (bytes): 20 bytes address of the public key
+    """
+    return sha3_digest(pub_key)[-20:]
+
+
 def address_from_public(pub_key: str) -> str:
     """
     Args:
@@ -90,7 +153,7 @@ def address_from_public(pub_key: str) -> str:
     Returns:
         address (str): Address of the public key
     """
-    return sha3(pub_key, True)[-40:]
+    return address_from_pub_key_bytes(bytes.fromhex(pub_key)).hex()
 
 
 def address_from_private(private_key: str) -> str:
@@ -99,6 +162,81 @@ def address_from_private(private_key: str) -> str:
     return address
 
 
+def sign_many(items: Iterable[Tuple[bytes, bytes]]) -> List[bytes]:
+    """Signs every message with its private key, calling libsecp256k1 directly
+
+    The shared context and the output buffers are reused for the whole
+    batch, no key or signature objects are created per message.
+
+    Args:
+        items: Messages and 32 bytes private keys to sign them with
+
+    Returns:
+        signatures (List[bytes]): Recoverable signatures with appended recovery bit
+    """
+    from secp256k1 import ffi, lib
+    context = secp256k1_context()
+    raw_signature = ffi.new("secp256k1_ecdsa_recoverable_signature *")
+    output = ffi.new("unsigned char[64]")
+    recovery = ffi.new("int *")
+    signatures = []
+    for (data, private_key) in items:
+        if len(private_key) != 32:
+            raise Exception("Private key not valid")
+        digest = sha3_256(data).digest()
+        if not lib.secp256k1_ecdsa_sign_recoverable(context, raw_signature, digest, private_key, ffi.NULL, ffi.NULL):
+            raise Exception("Private key not valid")
+        lib.secp256k1_ecdsa_recoverable_signature_serialize_compact(context, output, recovery, raw_signature)
+        signatures.append(bytes(ffi.buffer(output, 64)) + bytes([recovery[0]]))
+    return signatures
+
+
+def recover_many(items: Iterable[Tuple[bytes, bytes]]) -> List[bytes]:
+    """Recovers signer address of every message, calling libsecp256k1 directly
+
+    Args:
+        items: Messages and their signatures with recovery bit
+
+    Returns:
+        addresses (List[bytes]): 20 bytes addresses of signers
+    """
+    from secp256k1 import ffi, lib
+    context = secp256k1_context()
+    raw_signature = ffi.new("secp256k1_ecdsa_recoverable_signature *")
+    pub_key = ffi.new("secp256k1_pubkey *")
+    output = ffi.new("unsigned char[65]")
+    output_size = ffi.new("size_t *")
+    addresses = []
+    for (data, signature) in items:
+        # out of range recovery id aborts inside the library instead of failing
+        if len(signature) != 65 or signature[64] > 3:
+            raise Exception("Signature not valid")
+        if not lib.secp256k1_ecdsa_recoverable_signature_parse_compact(context, raw_signature, signature[:64], signature[64]):
+            raise Exception("Signature not valid")
+        if not lib.secp256k1_ecdsa_recover(context, pub_key, raw_signature, sha3_256(data).digest()):
+            raise Exception("Failed to recover public key")
+        output_size[0] = 65
+        lib.secp256k1_ec_pubkey_serialize(context, output, output_size, pub_key, lib.SECP256K1_EC_UNCOMPRESSED)
+        addresses.append(address_from_pub_key_bytes(bytes(ffi.buffer(output, 65))[1:]))
+    return addresses
+
+
+def sign_bytes(data: bytes, private_key: bytes) -> bytes:
+    """
+    Returns:
+        signature (bytes): Recoverable signature with appended recovery bit
+    """
+    return sign_many([(data, private_key)])[0]
+
+
+def recover_bytes(data: bytes, signature: bytes) -> bytes:
+    """
+    Returns:
+        address (bytes): Address recovered from signature with recovery bit
+    """
+    return recover_many([(data, signature)])[0]
+
+
 # returns recoverable signature with recovery bit appended at the end
 def sign(message: Union[bytes, str], private_key: str, hex: bool = True) -> str:
     """Signs input data with provided private key
@@ -117,11 +255,7 @@ def sign(message: Union[bytes, str], private_key: str, hex: bool = True) -> str:
         data = message.encode("utf-8")
     else:
         data = message
-    private_key = PrivateKey(bytes.fromhex(private_key))
-    signature = private_key.ecdsa_sign_recoverable(data, digest=sha3_256)
-    (signature, recovery) = private_key.ecdsa_recoverable_serialize(signature)
-    signature += bytes([recovery])
-    return signature.hex()
+    return sign_bytes(data, bytes.fromhex(private_key)).hex()
 
 
 # returns address
@@ -142,8 +276,4 @@ def recover(message: Union[bytes, str], signature: str, hex: bool = True) -> str
         data = message.encode("utf-8")
     else:
         data = message
-    pub_key = PublicKey(flags=ALL_FLAGS)
-    signature = bytes.fromhex(signature)
-    signature = pub_key.ecdsa_recoverable_deserialize(signature[:-1], int.from_bytes(signature[-1:], "big"))
-    pub_key = PublicKey(pub_key.ecdsa_recover(data, signature, digest=sha3_256))
-    return address_from_public(pub_key.serialize(False).hex()[2:])
+    return recover_bytes(data, bytes.fromhex(signature)).hex()
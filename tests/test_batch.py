@@ -0,0 +1,28 @@
+from io import StringIO
+import json
+from unittest import TestCase
+from chainee.batch import process_line, run_batch
+
+private_key = "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe"
+
+
+class TestBatch(TestCase):
+
+    def setUp(self):
+        self.requests = []
+        for i in range(50):
+            self.requests.append(json.dumps({"command": "sign", "id": i, "message": "%02x" % i, "private_key": private_key, "hex": True}))
+            self.requests.append(json.dumps({"command": "sha3", "id": i, "input": str(i)}))
+
+    def test_process_line(self):
+        response = json.loads(process_line('{"command": "sha3", "id": 7, "input": "abcdef", "hex": true}'))
+        self.assertEqual(7, response["id"])
+        self.assertEqual("8b8a2a6bc589cd378fc57f47d5668c58b31167b2bf9e632696e5c2d50fc16002", response["result"])
+        self.assertEqual("Unrecognized command", json.loads(process_line('{"command": "x"}'))["error"])
+
+    def test_order(self):
+        expected = "".join(process_line(request) + "\n" for request in self.requests)
+        for workers in [1, 2]:
+            output = StringIO()
+            run_batch(StringIO("\n".join(self.requests) + "\n"), output, workers, 8)
+            self.assertEqual(expected, output.getvalue())
@@ -1,17 +1,22 @@
 from unittest import TestCase
-from chainee.block import Block
+from unittest.mock import patch
+from chainee.block import Block, header_size
+from chainee.transaction import Transaction
+
+# block from README example, serialized with "<H" transaction framing
+legacy_block = "010000007af2b9ea10e70309822bc8a865fbd3a8ecacc0ad8918c0145166fba4a4765f48b751bfbcd968a0d5836a48b68e28f62c886f50dc91fa6413789b5e95971421ae7309e11b1e0484b7ecee3905dcdd816d660b2f4c000000003363355e0000000001006000000001b751bfbcd968a0d5836a48b68e28f62c886f50dc0100000000000000f03597bae1731280c28fa6eea783df89c38b622444d90bda3f22c44e8564dfb608dbcb38796f4c9bfd6577f5180f18b7160183a0facfed8df47a906d25efea3a01"
 
 
 class TestBlock(TestCase):
 
     def setUp(self):
-        address = "c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"
+        address = bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")
         timestamp = 1579861388
-        self.block = Block(0, "0" * 64, address, 0, timestamp, 0)
+        self.block = Block(0, bytes(32), address, 0, timestamp, 0)
 
     def test_hash(self):
         self.assertEqual(
-            self.block.hash(),
+            self.block.hash().hex(),
             "075869850a068c32c4e8aca47218c3a65fa3a0de83b529af335c56a3d3c5df62"
         )
 
@@ -25,3 +30,39 @@ class TestBlock(TestCase):
         serialized = self.block.serialize(False)
         temp_block = Block.deserialize(serialized)
         self.assertEqual(serialized, temp_block.serialize(False))
+
+    def test_header_to_dict(self):
+        header = self.block.header_to_dict()
+        self.assertEqual(self.block.hash().hex(), header["hash"])
+        self.assertEqual(0, header["transaction_count"])
+
+    def test_deserialize_legacy(self):
+        block = Block.deserialize(bytes.fromhex(legacy_block))
+        self.assertEqual(1, len(block.transactions))
+        self.assertEqual(
+            block.hash().hex(),
+            "e32119c323e18f203c50614f602561d19d817cea9cdc70b61979736051888239"
+        )
+        temp_block = Block.deserialize(block.serialize())
+        self.assertEqual(block.hash(), temp_block.hash())
+        self.assertEqual(block.serialize(), temp_block.serialize())
+
+    def test_large_block(self):
+        for i in range(100000):
+            self.block.add_transaction(Transaction(i % 65536, {i.to_bytes(20, "big"): 1}))
+        serialized = self.block.serialize()
+        temp_block = Block.deserialize(serialized)
+        self.assertEqual(100000, len(temp_block.transactions))
+        self.assertEqual(serialized, temp_block.serialize())
+
+    def test_decoded_root(self):
+        self.block.add_transaction(Transaction(0, {bytes(20): 1}))
+        block_hash = self.block.hash()
+        serialized = self.block.serialize()
+        temp_block = Block.deserialize(serialized)
+        with patch("chainee.block.merkle_tree_root", side_effect=AssertionError):
+            self.assertEqual(block_hash, temp_block.hash())
+            self.assertEqual(serialized[:header_size], temp_block.serialize(False))
+        self.assertNotEqual(block_hash, Block.deserialize(serialized[:header_size]).hash())
+        temp_block.add_transaction(Transaction(1, {bytes(20): 1}))
+        self.assertNotEqual(block_hash, temp_block.hash())
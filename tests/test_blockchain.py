@@ -1,18 +1,21 @@
+from tempfile import TemporaryDirectory
 from unittest import TestCase
+from unittest.mock import patch
 from chainee.block import Block
 from chainee.blockchain import Blockchain
 from chainee.transaction import Transaction
+from chainee.utils import recover_many
 
 
 class TestBlockchain(TestCase):
 
     def setUp(self):
         self.blockchain = Blockchain()
-        address = "c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"
+        address = bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")
         timestamp = 1579861388
-        self.genesis = Block(0, "0" * 64, address, 0, timestamp, 0)
+        self.genesis = Block(0, bytes(32), address, 0, timestamp, 0)
         self.transaction = Transaction(0, {
-            "0000000000000000000000000000000000000000": 5
+            bytes(20): 5
         })
         self.transaction.sign(
             "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe")
@@ -54,11 +57,57 @@ class TestBlockchain(TestCase):
     def test_get_balance(self):
         self.assertEqual(
             5,
-            self.blockchain.get_balance("0000000000000000000000000000000000000000")
+            self.blockchain.get_balance(bytes(20))
         )
 
     def test_get_nonce(self):
         self.assertEqual(
             1,
-            self.blockchain.get_nonce("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")
+            self.blockchain.get_nonce(bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"))
         )
+
+    def test_scan_blocks(self):
+        (hashes, skipped) = self.blockchain.scan_blocks(bytes(20), 0, 1)
+        self.assertEqual([self.block.hash()], hashes)
+        self.assertEqual(1, skipped)
+
+    def test_load(self):
+        with TemporaryDirectory() as datadir:
+            self.blockchain.config = {"datadir": datadir}
+            self.blockchain.save()
+            blockchain = Blockchain({"datadir": datadir, "loadqueuedepth": 1})
+            stats = blockchain.load()
+            self.assertEqual(2, blockchain.block_count)
+            self.assertEqual(2, stats[-1].items)
+            self.assertEqual(5, blockchain.get_balance(bytes(20)))
+
+    def test_load_assume_valid(self):
+        self.assertIsNone(self.blockchain.sender_index)
+        with TemporaryDirectory() as datadir:
+            blockchain = Blockchain({"datadir": datadir, "assumevalid": self.block.hash().hex()})
+            blockchain.add_block(self.genesis)
+            blockchain.add_block(self.block)
+            blockchain.save()
+            blockchain = Blockchain({"datadir": datadir, "assumevalid": self.block.hash().hex()})
+            with patch("chainee.transaction.recover_many") as recover:
+                blockchain.load()
+                recover.assert_not_called()
+            self.assertEqual(5, blockchain.get_balance(bytes(20)))
+            blockchain = Blockchain({"datadir": datadir, "assumevalid": self.genesis.hash().hex()})
+            with patch("chainee.transaction.recover_many", wraps=recover_many) as recover:
+                blockchain.load()
+                recover.assert_called()
+
+    def test_balance_stats(self):
+        self.assertEqual(20, self.blockchain.balance_stats.supply)
+        self.assertEqual(2, self.blockchain.balance_stats.funded_accounts())
+        self.assertEqual(
+            [(bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"), 15)],
+            self.blockchain.balance_stats.top(1)
+        )
+
+    def test_get_blocks(self):
+        blocks = self.blockchain.get_blocks(1, 5)
+        self.assertEqual(1, len(blocks))
+        self.assertEqual(self.block.hash(), blocks[0][0])
+        self.assertEqual(self.block.hash(), blocks[0][1].hash())
@@ -0,0 +1,28 @@
+from unittest import TestCase
+from chainee.bloom import BloomFilter
+
+
+class TestBloom(TestCase):
+
+    def setUp(self):
+        self.addresses = [
+            bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"),
+            bytes.fromhex("38fb65b08416b9870067b6cba63fa50a81bc78c8"),
+        ]
+        self.bloom = BloomFilter.create(self.addresses, 0.01)
+
+    def test_contains(self):
+        for address in self.addresses:
+            self.assertIn(address, self.bloom)
+        self.assertNotIn(bytes(20), self.bloom)
+
+    def test_false_positive_rate(self):
+        addresses = [i.to_bytes(20, "big") for i in range(1000)]
+        bloom = BloomFilter.create(addresses, 0.01)
+        false_positives = sum(1 for i in range(1000, 11000) if i.to_bytes(20, "big") in bloom)
+        self.assertLess(false_positives, 300)
+
+    def test_deserialize(self):
+        serialized = self.bloom.serialize()
+        temp_bloom = BloomFilter.deserialize(serialized)
+        self.assertEqual(serialized, temp_bloom.serialize())
@@ -0,0 +1,27 @@
+from unittest import TestCase
+from chainee.cache import ResponseCache
+
+
+class TestCache(TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(1000)
+
+    def test_get(self):
+        self.cache.put("a", "response")
+        self.assertEqual("response", self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(0.5, self.cache.hit_rate())
+
+    def test_eviction(self):
+        for i in range(100):
+            self.cache.put(i, "x" * 100)
+        self.assertLessEqual(self.cache.size, 1000)
+        self.assertIsNone(self.cache.get(0))
+        self.assertIsNotNone(self.cache.get(99))
+
+    def test_clear(self):
+        self.cache.put("a", "response")
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(0, self.cache.size)
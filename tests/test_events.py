@@ -0,0 +1,75 @@
+import json
+import os
+import socket
+from tempfile import TemporaryDirectory
+import time
+from unittest import TestCase
+from chainee.block import Block
+from chainee.blockchain import Blockchain
+from chainee.events import EventServer
+from chainee.transaction import Transaction
+
+private_key = "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe"
+address = bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")
+
+
+class TestEvents(TestCase):
+
+    def setUp(self):
+        self.blockchain = Blockchain()
+        self.genesis = Block(0, bytes(32), address, 0, 1579861388, 0)
+        self.blockchain.add_block(self.genesis)
+        transaction = Transaction(0, {bytes(20): 5})
+        transaction.sign(private_key)
+        self.block = Block(1, self.genesis.hash(), address, 0, 1579861448, 0, [transaction])
+
+    def connect(self, server):
+        client = socket.create_connection(server.address)
+        client.settimeout(5)
+        return (client, client.makefile("r", encoding="utf-8"))
+
+    def test_events(self):
+        server = EventServer("127.0.0.1:0")
+        server.start()
+        self.blockchain.add_listener(server.publish)
+        (client, stream) = self.connect(server)
+        client.sendall(b"watch zz\nwatch 0000\n")
+        self.assertEqual("error", json.loads(stream.readline())["type"])
+        self.assertEqual("error", json.loads(stream.readline())["type"])
+        client.sendall(b"watch 0000000000000000000000000000000000000000\n")
+        self.assertEqual("watch", json.loads(stream.readline())["type"])
+        self.blockchain.add_block(self.block)
+        events = [json.loads(stream.readline()) for _ in range(3)]
+        self.assertEqual(["block", "transaction", "balance"], [event["type"] for event in events])
+        self.assertEqual(self.block.hash().hex(), events[0]["hash"])
+        self.assertEqual(address.hex(), events[1]["address"])
+        self.assertEqual(5, events[2]["balance"])
+        client.close()
+        server.stop()
+
+    def test_unix_socket(self):
+        with TemporaryDirectory() as datadir:
+            server = EventServer(os.path.join(datadir, "events.sock"))
+            server.start()
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.settimeout(5)
+            client.connect(server.address)
+            client.sendall(b"unknown\n")
+            self.assertEqual("error", json.loads(client.makefile("r").readline())["type"])
+            client.close()
+            server.stop()
+
+    def test_slow_subscriber(self):
+        server = EventServer("127.0.0.1:0", queue_size=4)
+        server.start()
+        (client, _) = self.connect(server)
+        deadline = time.time() + 5
+        while len(server.subscribers) < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        self.block.transactions = self.block.transactions * 1000
+        while server.disconnected < 1 and time.time() < deadline:
+            server.publish(self.block.hash(), self.block, self.blockchain.state_index)
+        self.assertEqual(1, server.disconnected)
+        self.assertEqual(0, len(server.subscribers))
+        client.close()
+        server.stop()
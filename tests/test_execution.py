@@ -0,0 +1,120 @@
+from unittest import TestCase
+from unittest.mock import patch
+from chainee.block import Block
+from chainee.blockchain import Blockchain
+from chainee.execution import partition_transactions
+from chainee.transaction import Transaction
+from chainee.utils import address_from_private, sha3
+
+
+def key(seed):
+    return sha3(seed, False)
+
+
+def address(seed):
+    return bytes.fromhex(address_from_private(key(seed)))
+
+
+def transaction(seed, nonce, out):
+    transaction = Transaction(nonce, out)
+    transaction.sign(key(seed))
+    return transaction
+
+
+class TestExecution(TestCase):
+
+    def setUp(self):
+        self.sequential = Blockchain()
+        # pool is only used with several CPUs
+        with patch("chainee.execution.os.cpu_count", return_value=4):
+            self.parallel = Blockchain({"executionworkers": 4})
+        self.blocks = [Block(0, bytes(32), address("a"), 0, 1579861388, 0)]
+        self.add_block(address("b"), [
+            transaction("a", 0, {address("c"): 4}),
+        ])
+        self.add_block(address("c"), [
+            transaction("a", 1, {address("x"): 2}),
+            transaction("b", 0, {address("y"): 5}),
+            transaction("a", 2, {address("z"): 1}),
+            transaction("c", 0, {address("y"): 1}),
+        ])
+
+    def tearDown(self):
+        self.parallel.close()
+
+    def add_block(self, beneficiary, transactions):
+        parent = self.blocks[-1]
+        block = Block(parent.number + 1, parent.hash(), beneficiary, 0, parent.timestamp + 60, 0, transactions)
+        self.blocks.append(block)
+        return block
+
+    def test_partition_transactions(self):
+        self.assertEqual(
+            [[0, 2], [1, 3]],
+            partition_transactions(self.blocks[2].transactions)
+        )
+
+    def test_state(self):
+        for block in self.blocks:
+            self.sequential.add_block(block)
+            self.parallel.add_block(block)
+        for seed in ["a", "b", "c", "x", "y", "z"]:
+            self.assertEqual(
+                self.sequential.get_balance(address(seed)),
+                self.parallel.get_balance(address(seed))
+            )
+            self.assertEqual(
+                self.sequential.get_nonce(address(seed)),
+                self.parallel.get_nonce(address(seed))
+            )
+        self.assertEqual(4, self.parallel.executor.workers)
+        stats = self.parallel.execution_stats[self.blocks[2].hash()]
+        self.assertEqual(2, stats.groups)
+        self.assertEqual(2.0, stats.parallelism())
+
+    def test_errors(self):
+        for block in self.blocks:
+            self.sequential.add_block(block)
+            self.parallel.add_block(block)
+        self.add_block(address("a"), [
+            transaction("b", 1, {address("x"): 1}),
+            transaction("c", 1, {address("y"): 100}),
+            transaction("a", 0, {address("z"): 1}),
+        ])
+        errors = []
+        for blockchain in [self.sequential, self.parallel]:
+            with self.assertRaises(Exception) as context:
+                blockchain.add_block(self.blocks[-1])
+            errors.append(str(context.exception))
+            self.assertEqual(5, blockchain.get_balance(address("b")))
+        self.assertEqual(["Insufficient balance", "Insufficient balance"], errors)
+
+    def test_recovery_errors(self):
+        for block in self.blocks:
+            self.sequential.add_block(block)
+            self.parallel.add_block(block)
+        malformed = transaction("c", 1, {address("y"): 1})
+        malformed.signature = malformed.signature[:-1] + bytes([7])
+        self.add_block(address("a"), [
+            transaction("b", 1, {address("x"): 100}),
+            malformed,
+        ])
+        errors = []
+        for blockchain in [self.sequential, self.parallel]:
+            with self.assertRaises(Exception) as context:
+                blockchain.add_block(self.blocks[-1])
+            errors.append(str(context.exception))
+        self.assertEqual(["Insufficient balance", "Insufficient balance"], errors)
+        self.blocks[-1].transactions = [malformed]
+        errors = []
+        for blockchain in [self.sequential, self.parallel]:
+            with self.assertRaises(Exception) as context:
+                blockchain.add_block(self.blocks[-1])
+            errors.append(str(context.exception))
+        self.assertEqual(["Signature not valid", "Signature not valid"], errors)
+
+    def test_stats_bounded(self):
+        with patch("chainee.blockchain.execution_stats_size", 2):
+            for block in self.blocks:
+                self.parallel.add_block(block)
+        self.assertEqual([block.hash() for block in self.blocks[1:]], list(self.parallel.execution_stats.keys()))
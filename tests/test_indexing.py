@@ -0,0 +1,36 @@
+import struct
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from chainee.block import Block
+from chainee.indexing import BlockIndex, HexIndex
+from chainee.transaction import Transaction
+
+
+class TestIndexing(TestCase):
+
+    def setUp(self):
+        self.datadir = TemporaryDirectory()
+        self.file = self.datadir.name + "/index.dat"
+
+    def tearDown(self):
+        self.datadir.cleanup()
+
+    def test_large_value(self):
+        block = Block(0, bytes(32), bytes(20), 0, 1579861388, 0)
+        for i in range(100000):
+            block.add_transaction(Transaction(i % 65536, {i.to_bytes(20, "big"): 1}))
+        index = BlockIndex()
+        index.set(block.hash(), block)
+        index.save(self.file)
+        temp_index = BlockIndex()
+        temp_index.load(self.file)
+        self.assertEqual(100000, len(temp_index.get(block.hash()).transactions))
+
+    def test_load_legacy(self):
+        with open(self.file, "wb") as f:
+            for i in range(3):
+                f.write(struct.pack("<BH", 32, 32) + bytes([i]) * 64)
+        index = HexIndex()
+        index.load(self.file)
+        self.assertEqual(3, len(index.keys()))
+        self.assertEqual(bytes([2]) * 32, index.get(bytes([2]) * 32))
@@ -0,0 +1,35 @@
+from unittest import TestCase
+from chainee.block import Block
+from chainee.memory import AllocationTracker, deep_size
+from chainee.transaction import Transaction
+
+
+class TestMemory(TestCase):
+
+    def test_deep_size(self):
+        data = bytes(1000)
+        (size, types) = deep_size([data, data, {"a": data}])
+        self.assertGreater(size, 1000)
+        self.assertLess(size, 2000)
+        self.assertEqual(size, sum(types.values()))
+
+    def test_deep_size_types(self):
+        block = Block(1, bytes(32), bytes(20), 0, 0, 0)
+        block.add_transaction(Transaction(0, {bytes(20): 1}))
+        (_, types) = deep_size(block)
+        self.assertIn("Block", types)
+        self.assertIn("Transaction", types)
+
+    def test_allocation_tracker(self):
+        tracker = AllocationTracker()
+        self.assertRaises(Exception, tracker.diff)
+        tracker.start()
+        try:
+            retained = [bytes(1000) for _ in range(1000)]
+            sites = tracker.diff(5)
+            self.assertGreater(sites[0]["size_diff"], 900000)
+            self.assertIn("test_memory.py", sites[0]["site"])
+        finally:
+            tracker.stop()
+        self.assertFalse(tracker.is_tracing())
+        del retained
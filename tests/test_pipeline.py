@@ -0,0 +1,29 @@
+from unittest import TestCase
+from chainee.pipeline import run_pipeline
+
+
+class TestPipeline(TestCase):
+
+    def test_order(self):
+        results = []
+        stats = run_pipeline(range(1000), [
+            ("read", None),
+            ("double", lambda item: item * 2),
+            ("collect", results.append),
+        ], 4)
+        self.assertEqual([item * 2 for item in range(1000)], results)
+        self.assertEqual([1000, 1000, 1000], [stage.items for stage in stats])
+
+    def test_error(self):
+        def fail(item):
+            if item == 500:
+                raise Exception("Stage failed")
+            return item
+
+        with self.assertRaises(Exception) as context:
+            run_pipeline(range(1000), [
+                ("read", None),
+                ("fail", fail),
+                ("collect", lambda item: None),
+            ], 4)
+        self.assertEqual("Stage failed", str(context.exception))
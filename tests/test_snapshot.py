@@ -0,0 +1,112 @@
+from threading import Thread
+from unittest import TestCase
+from chainee.block import Block
+from chainee.blockchain import Blockchain
+from chainee.transaction import Transaction
+from chainee.utils import sha3_digest
+
+private_key = "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe"
+address = bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")
+
+
+def generate_blocks(count):
+    blocks = []
+    receivers = []
+    parent_hash = bytes(32)
+    nonce = 0
+    for number in range(count):
+        block = Block(number, parent_hash, address, 0, 1579861388 + number * 60, 0)
+        if number > 0:
+            for _ in range(3):
+                receiver = sha3_digest(bytes([nonce]))[-20:]
+                transaction = Transaction(nonce, {receiver: 2})
+                transaction.sign(private_key)
+                block.add_transaction(transaction)
+                receivers.append(receiver)
+                nonce += 1
+        blocks.append(block)
+        parent_hash = block.hash()
+    return (blocks, [address] + receivers)
+
+
+class TestSnapshot(TestCase):
+
+    def setUp(self):
+        self.blockchain = Blockchain()
+        (self.blocks, self.addresses) = generate_blocks(40)
+
+    def test_isolation(self):
+        self.blockchain.add_block(self.blocks[0])
+        self.blockchain.add_block(self.blocks[1])
+        with self.blockchain.snapshot() as snapshot:
+            self.blockchain.add_block(self.blocks[2])
+            self.assertEqual(2, snapshot.block_count)
+            self.assertEqual(14, snapshot.get_balance(address))
+            self.assertEqual(3, snapshot.get_nonce(address))
+            self.assertEqual(0, snapshot.get_balance(self.addresses[4]))
+            self.assertIsNone(snapshot.get_block_hash(2))
+            self.assertIsNone(snapshot.get_block(self.blocks[2].hash()))
+            self.assertIsNone(snapshot.get_transaction(self.blocks[2].transactions[0].id()))
+            self.assertEqual(self.blocks[1].hash(), snapshot.get_latest_block().hash())
+            self.assertEqual(18, self.blockchain.get_balance(address))
+        with self.blockchain.snapshot() as snapshot:
+            self.assertEqual(18, snapshot.get_balance(address))
+            self.assertEqual(2, snapshot.get_balance(self.addresses[4]))
+
+    def test_prune(self):
+        self.blockchain = Blockchain({"historyretention": 0})
+        snapshot = self.blockchain.snapshot()
+        for block in self.blocks[:5]:
+            self.blockchain.add_block(block)
+        self.assertEqual(0, snapshot.get_balance(address))
+        self.assertGreater(len(self.blockchain.state_history._records), 0)
+        snapshot.close()
+        self.blockchain.add_block(self.blocks[5])
+        self.assertEqual(0, self.blockchain.state_history.pinned())
+        self.assertEqual(0, len(self.blockchain.state_history._records))
+
+    def test_history(self):
+        for block in self.blocks[:5]:
+            self.blockchain.add_block(block)
+        self.assertIsNone(self.blockchain.get_account_at(self.addresses[1], 0))
+        self.assertEqual({"balance": 14, "nonce": 3}, self.blockchain.get_account_at(address, 1))
+        self.assertEqual({"balance": 2, "nonce": 0}, self.blockchain.get_account_at(self.addresses[1], 3))
+        self.assertEqual(self.blockchain.get_balance(address), self.blockchain.get_account_at(address, 4)["balance"])
+        self.assertRaises(Exception, self.blockchain.get_account_at, address, 5)
+        records = self.blockchain.state_history._records[address][1]
+        self.blockchain.add_block(self.blocks[5])
+        self.assertIs(records, self.blockchain.state_history._records[address][1])
+        self.assertEqual(6, len(records))
+
+    def test_history_retention(self):
+        self.blockchain = Blockchain({"historyretention": 2})
+        for block in self.blocks[:10]:
+            self.blockchain.add_block(block)
+        self.assertEqual({"balance": 38, "nonce": 21}, self.blockchain.get_account_at(address, 7))
+        self.assertRaises(Exception, self.blockchain.get_account_at, address, 6)
+        (start, records) = self.blockchain.state_history._records[address]
+        self.assertEqual(2, len(records) - start)
+
+    def test_concurrent_readers(self):
+        errors = []
+        done = []
+
+        def read():
+            while len(done) == 0:
+                with self.blockchain.snapshot() as snapshot:
+                    supply = sum(snapshot.get_balance(address) for address in self.addresses)
+                    if supply != 10 * snapshot.block_count:
+                        errors.append((snapshot.block_count, supply))
+                    latest = snapshot.get_latest_block()
+                    if latest is not None and latest.number != snapshot.block_count - 1:
+                        errors.append(latest.number)
+
+        readers = [Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for block in self.blocks:
+            self.blockchain.add_block(block)
+        done.append(True)
+        for reader in readers:
+            reader.join()
+        self.assertEqual([], errors)
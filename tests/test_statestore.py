@@ -0,0 +1,60 @@
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from chainee.indexing import StateIndex
+from chainee.statestore import HashedStateStore, flushing
+
+
+def address(i):
+    return i.to_bytes(20, "little")
+
+
+class TestStateStore(TestCase):
+
+    def setUp(self):
+        self.datadir = TemporaryDirectory()
+        self.file = self.datadir.name + "/state.dat"
+        self.store = HashedStateStore(self.file, capacity=16, cache_size=8)
+        self.state = StateIndex(backend=self.store)
+
+    def tearDown(self):
+        self.datadir.cleanup()
+
+    def test_get_set(self):
+        for i in range(1000):
+            self.state.set_balance(address(i), i + 1)
+        self.state.set_nonce(address(7), 3)
+        for i in range(1000):
+            self.assertEqual(i + 1, self.state.get_balance(address(i)))
+        self.assertEqual(3, self.state.get_nonce(address(7)))
+        self.assertEqual(0, self.state.get_balance(address(1000)))
+        self.assertEqual(1000, self.state.count())
+
+    def test_persistence(self):
+        for i in range(100):
+            self.state.set_balance(address(i), i + 1)
+        self.store.close()
+        store = HashedStateStore(self.file)
+        state = StateIndex(backend=store)
+        self.assertEqual(100, state.count())
+        self.assertEqual(43, state.get_balance(address(42)))
+        self.assertEqual(sorted(address(i) for i in range(100)), sorted(state.keys()))
+        store.close()
+        store = HashedStateStore(self.file, truncate=True)
+        self.assertEqual(0, store.count())
+        store.close()
+
+    def test_block_count(self):
+        self.store.block_count = 5
+        self.state.set_balance(address(1), 1)
+        self.state.flush()
+        self.store.block_count = 6
+        for i in range(100):
+            self.state.set_balance(address(i), 2)
+        # records evicted from the cache reach the table before the next flush
+        store = HashedStateStore(self.file)
+        self.assertEqual(flushing, store.block_count)
+        store.close()
+        self.store.close()
+        store = HashedStateStore(self.file)
+        self.assertEqual(6, store.block_count)
+        store.close()
@@ -0,0 +1,71 @@
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from chainee.block import Block
+from chainee.blockchain import Blockchain
+from chainee.indexing import StateIndex
+from chainee.storage import SQLiteStorage
+from chainee.transaction import Transaction
+
+
+class TestStorage(TestCase):
+
+    def setUp(self):
+        self.datadir = TemporaryDirectory()
+        self.address = bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")
+        timestamp = 1579861388
+        self.genesis = Block(0, bytes(32), self.address, 0, timestamp, 0)
+        self.transaction = Transaction(0, {
+            bytes(20): 5
+        })
+        self.transaction.sign(
+            "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe")
+        self.block = Block(1, self.genesis.hash(), self.address,
+                           0, timestamp + 60, 0, [self.transaction])
+
+    def tearDown(self):
+        self.datadir.cleanup()
+
+    def test_sqlite_blockchain(self):
+        blockchain = Blockchain({"datadir": self.datadir.name, "storage": "sqlite"})
+        blockchain.add_block(self.genesis)
+        blockchain.add_block(self.block)
+        blockchain.storage.close()
+        blockchain = Blockchain({"datadir": self.datadir.name, "storage": "sqlite"})
+        self.assertEqual([], blockchain.load())
+        self.assertEqual(2, blockchain.block_count)
+        self.assertEqual(self.block.hash(), blockchain.get_latest_block().hash())
+        self.assertEqual(self.transaction.id(), blockchain.get_transaction(self.transaction.id()).id())
+        self.assertEqual(5, blockchain.get_balance(bytes(20)))
+        self.assertEqual(1, blockchain.get_nonce(self.address))
+        self.assertEqual(20, blockchain.balance_stats.supply)
+        self.assertEqual(2, blockchain.balance_stats.funded_accounts())
+        blockchain.storage.close()
+
+    def test_state_store_ahead_of_chain(self):
+        config = {"datadir": self.datadir.name, "storage": "sqlite", "statestore": "disk"}
+        blockchain = Blockchain(config)
+        blockchain.add_block(self.genesis)
+        blockchain.add_block(self.block)
+        self.assertEqual(2, blockchain.state_store.block_count)
+        # state of a third block flushed, but the node stopped before COMMIT
+        blockchain.state_index.set_balance(bytes(20), 1000)
+        blockchain.state_store.block_count = 3
+        blockchain.state_store.close()
+        blockchain.storage.close()
+        blockchain = Blockchain(config)
+        self.assertEqual(2, blockchain.state_store.block_count)
+        self.assertEqual(5, blockchain.get_balance(bytes(20)))
+        self.assertEqual(15, blockchain.get_balance(self.address))
+        blockchain.state_store.close()
+        blockchain.storage.close()
+
+    def test_rollback(self):
+        storage = SQLiteStorage(self.datadir.name + "/chain.db")
+        state = StateIndex(backend=storage.backend("state"))
+        with self.assertRaises(Exception):
+            with storage.transaction():
+                state.set_balance(self.address, 10)
+                raise Exception("Block failed")
+        self.assertEqual(0, state.get_balance(self.address))
+        self.assertEqual(0, state.count())
+        storage.close()
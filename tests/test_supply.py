@@ -0,0 +1,60 @@
+import bisect
+import random
+from unittest import TestCase
+from chainee.supply import BalanceStats, SortedBalances
+
+
+class TestSupply(TestCase):
+
+    def test_sorted_balances(self):
+        rng = random.Random(1)
+        balances = SortedBalances()
+        expected = []
+        for _ in range(2000):
+            if len(expected) > 0 and rng.random() < 0.4:
+                entry = expected.pop(rng.randrange(len(expected)))
+                balances.remove(entry)
+            else:
+                entry = (rng.randrange(100), rng.randrange(2 ** 32).to_bytes(20, "little"))
+                if entry in expected:
+                    continue
+                bisect.insort(expected, entry)
+                balances.insert(entry)
+        self.assertEqual(len(expected), len(balances))
+        self.assertEqual(expected, [balances[i] for i in range(len(balances))])
+        self.assertEqual(expected[10:15], balances.slice(10, 5))
+        self.assertRaises(KeyError, balances.remove, (1000, bytes(20)))
+
+    def test_balance_stats(self):
+        stats = BalanceStats()
+        for i in range(1, 11):
+            stats.update(bytes([i]) * 20, 0, i * 10)
+        stats.update(bytes([1]) * 20, 10, 0)
+        stats.update(bytes([2]) * 20, 20, 200)
+        self.assertEqual(720, stats.supply)
+        self.assertEqual(9, stats.funded_accounts())
+        self.assertEqual([(bytes([2]) * 20, 200), (bytes([10]) * 20, 100)], stats.top(2))
+        self.assertEqual(70, stats.percentile(50))
+
+    def test_from_sorted(self):
+        rng = random.Random(2)
+        expected = sorted((rng.randrange(100), i.to_bytes(20, "little")) for i in range(1000))
+        balances = SortedBalances.from_sorted(expected)
+        self.assertEqual(expected, [balances[i] for i in range(len(balances))])
+        self.assertEqual(expected[990:], balances.slice(990, 20))
+        for _ in range(500):
+            entry = expected.pop(rng.randrange(len(expected)))
+            balances.remove(entry)
+            entry = (rng.randrange(100), rng.randrange(2 ** 32).to_bytes(20, "big"))
+            bisect.insort(expected, entry)
+            balances.insert(entry)
+        self.assertEqual(expected, [balances[i] for i in range(len(balances))])
+        self.assertEqual(0, len(SortedBalances.from_sorted([])))
+
+    def test_rebuild(self):
+        stats = BalanceStats()
+        stats.rebuild([(bytes([i]) * 20, i * 10) for i in range(10, -1, -1)])
+        self.assertEqual(550, stats.supply)
+        self.assertEqual(10, stats.funded_accounts())
+        self.assertEqual([(bytes([10]) * 20, 100)], stats.top(1))
+        self.assertEqual(60, stats.percentile(50))
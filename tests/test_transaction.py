@@ -7,20 +7,20 @@ class TestTransaction(TestCase):
     def setUp(self):
         private_key = "685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe"
         out = {
-            "38fb65b08416b9870067b6cba63fa50a81bc78c8": 100
+            bytes.fromhex("38fb65b08416b9870067b6cba63fa50a81bc78c8"): 100
         }
         self.transaction = Transaction(1, out)
         self.transaction.sign(private_key)
 
     def test_id(self):
         self.assertEqual(
-            self.transaction.id(),
+            self.transaction.id().hex(),
             "d1ed0b9ab80eb6dcacb8d54cc164700e34a1950fbe0589a181b158568f7c4041"
         )
 
     def test_address(self):
         self.assertEqual(
-            self.transaction.address(),
+            self.transaction.address().hex(),
             "c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"
         )
 
@@ -37,3 +37,16 @@ class TestTransaction(TestCase):
         serialized = self.transaction.serialize()
         temp_transaction = Transaction.deserialize(serialized)
         self.assertEqual(serialized, temp_transaction.serialize())
+
+    def test_many_outputs(self):
+        transaction = Transaction(1, {i.to_bytes(20, "big"): i + 1 for i in range(300)})
+        serialized = transaction.serialize()
+        temp_transaction = Transaction.deserialize(serialized)
+        self.assertEqual(300, len(temp_transaction.out))
+        self.assertEqual(serialized, temp_transaction.serialize())
+
+    def test_recover_senders(self):
+        transactions = [Transaction.deserialize(self.transaction.serialize()) for _ in range(3)]
+        Transaction.recover_senders(transactions + [Transaction(0, {})])
+        for transaction in transactions:
+            self.assertEqual(self.transaction.address(), transaction._sender[1])
@@ -24,19 +24,19 @@ class TestUtils(TestCase):
 
     def test_validate_address(self):
         self.assertTrue(
-            utils.validate_address("0000000000000000000000000000000000000000"),
+            utils.validate_address(bytes(20)),
             "is valid address"
         )
         self.assertTrue(
-            utils.validate_address("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"),
+            utils.validate_address(bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")),
             "is valid address"
         )
         self.assertFalse(
-            utils.validate_address("1234567890"),
+            utils.validate_address(bytes.fromhex("1234567890")),
             "is not valid address"
         )
         self.assertFalse(
-            utils.validate_address("abcdefghijklmnopqrstuvwxyzabcdefghijklmn"),
+            utils.validate_address("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"),
             "is not valid address"
         )
 
@@ -50,6 +50,33 @@ class TestUtils(TestCase):
             "36f028580bb02cc8272a9a020f4200e346e276ae664e45ee80745574e2f5ab80"
         )
 
+    def test_merkle_tree_root(self):
+        leaves = [bytes([i]) for i in range(5)]
+        level = [utils.sha3_digest(leaf) for leaf in leaves] + [utils.sha3_digest(leaves[-1])]
+        level = [utils.sha3_digest(level[i] + level[i + 1]) for i in range(0, 6, 2)]
+        level = [utils.sha3_digest(level[0] + level[1]), utils.sha3_digest(level[2] + level[2])]
+        self.assertEqual(
+            utils.merkle_tree_root(leaves),
+            utils.sha3_digest(level[0] + level[1])
+        )
+        leaf = utils.sha3_digest(leaves[0])
+        self.assertEqual(
+            utils.merkle_tree_root(leaves[:1]),
+            utils.sha3_digest(leaf + leaf)
+        )
+
+    def test_merkle_tree_root_compatible(self):
+        # roots computed by the hex string implementation, for sizes it handled
+        roots = {
+            1: "b7a23e0a41c7b53076489f5917010b8a39cc313be1b2a5298d335a104d3e85fe",
+            2: "d9a58c55807dd1bd547132f162bb15314b2d185c828ae604c53e6eaf705a071c",
+            3: "401cf55366462d1c4f5e706b726aed0b345832ea3812b97c65756c3748697fa5",
+            4: "e349c4a7f57723a42f0869723644e28b2c0b03bb59585fc4765bebd708f19526",
+            8: "d41f89f9bb5557f714a72bfc4642425b1aa5f8e03f2084088294891e734f1bbd",
+        }
+        for (count, root) in roots.items():
+            self.assertEqual(root, utils.merkle_tree_root([bytes([i]) for i in range(count)]).hex())
+
     def test_generate_private_key(self):
         self.assertTrue(
             utils.validate_private_key(utils.generate_private_key()),
@@ -93,3 +120,26 @@ class TestUtils(TestCase):
             utils.recover("test", "6f2dfa18ba808d126ef8d7664cbb5331a4464f6ab739f82981a179e47569550636daa57960b6bfeef2981ea61141ce34b2febe811394ce3b46ffde0ce121516101", False),
             "c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47"
         )
+
+    def test_sign_many(self):
+        private_key = bytes.fromhex("685cf62751cef607271ed7190b6a707405c5b07ec0830156e748c0c2ea4a2cfe")
+        signatures = utils.sign_many([(bytes.fromhex("abcdef"), private_key), (b"test", private_key)])
+        self.assertEqual([
+            bytes.fromhex("b90e97baea96a2120a53d3ba34201705891e79beb8b86cfaf26a4e467264ac6e2481ffed9036a8403161d1d0bf7a7485f6e190d1ffdc1bccefd74fe6c547b30a01"),
+            bytes.fromhex("6f2dfa18ba808d126ef8d7664cbb5331a4464f6ab739f82981a179e47569550636daa57960b6bfeef2981ea61141ce34b2febe811394ce3b46ffde0ce121516101"),
+        ], signatures)
+        self.assertRaises(Exception, utils.sign_many, [(b"test", bytes(32))])
+        self.assertRaises(Exception, utils.sign_many, [(b"test", private_key[1:])])
+
+    def test_recover_many(self):
+        signature = bytes.fromhex("b90e97baea96a2120a53d3ba34201705891e79beb8b86cfaf26a4e467264ac6e2481ffed9036a8403161d1d0bf7a7485f6e190d1ffdc1bccefd74fe6c547b30a01")
+        self.assertEqual(
+            [bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")] * 2,
+            utils.recover_many([(bytes.fromhex("abcdef"), signature)] * 2)
+        )
+        self.assertNotEqual(
+            [bytes.fromhex("c70f4891d2ce22b1f62492605c1d5c2fc1a8ef47")],
+            utils.recover_many([(b"other", signature)])
+        )
+        self.assertRaises(Exception, utils.recover_many, [(b"test", signature[:-1] + bytes([4]))])
+        self.assertRaises(Exception, utils.recover_many, [(b"test", signature[:-1])])